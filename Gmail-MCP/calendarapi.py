@@ -1,37 +1,194 @@
+import time
+import uuid
+import hashlib
+import threading
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from auth import auth_calendar
+from calendarsync import store, parse_time
+import freebusy
+
+
+# Calendar batch requests accept at most 50 calls each.
+BATCH_SIZE = 50
+BATCH_RETRIES = 2
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_local = threading.local()
 
 
 def get_calendar_service():
-    """Initialize and return a Google Calendar API service."""
-    return auth_calendar()
+    """Return this thread's Google Calendar API service, building it on first use."""
+    service = getattr(_local, "service", None)
+    if service is None:
+        service = _local.service = auth_calendar()
+    return service
 
 
-def list_upcoming_events(max_results=10):
-    """List the next N upcoming events from the primary calendar."""
+def _ensure_synced(calendar_ids, refresh=False):
+    """Run an incremental sync for calendars whose cache is older than the sync interval."""
+    service = None
+    for calendar_id in calendar_ids:
+        if refresh or store.needs_sync(calendar_id):
+            service = service or get_calendar_service()
+            store.sync(service, calendar_id, force=refresh)
+
+
+def list_upcoming_events(max_results=10, time_min=None, time_max=None, calendar_ids=None, refresh=False):
+    """
+    List events from the local event cache, kept current by incremental syncs.
+    time_min/time_max are ISO 8601 strings (default: from now, no upper bound);
+    calendar_ids defaults to the primary calendar.
+    """
     try:
-        service = get_calendar_service()
-        now = datetime.utcnow().isoformat() + "Z"
-        events_result = (
-            service.events()
-            .list(
-                calendarId="primary",
-                timeMin=now,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
-        )
-        events = events_result.get("items", [])
+        calendar_ids = calendar_ids or ["primary"]
+        _ensure_synced(calendar_ids, refresh)
+
+        lo = parse_time(time_min) if time_min else datetime.now(timezone.utc).timestamp()
+        hi = parse_time(time_max) if time_max else None
+        events = store.query(calendar_ids, lo, hi, max_results)
 
         if not events:
             return []
 
         return events
 
+    except ValueError as error:
+        return {"error": f"Invalid time: {error}"}
+    except HttpError as error:
+        return {"error": str(error)}
+
+
+def _event_body(summary, start_time, duration_minutes=60, description=None, location=None):
+    start_dt = datetime.fromisoformat(start_time)
+    end_dt = start_dt + timedelta(minutes=duration_minutes)
+    return {
+        "summary": summary,
+        "location": location,
+        "description": description,
+        "start": {"dateTime": start_dt.isoformat(), "timeZone": "UTC"},
+        "end": {"dateTime": end_dt.isoformat(), "timeZone": "UTC"},
+    }
+
+
+def _event_id(spec):
+    """
+    Event id for an insert (hex digits are valid base32hex). A caller's request_id
+    gives a deterministic id, so retrying the same request hits 409 instead of
+    creating a duplicate; without one the id is random, since Google never lets
+    the id of a deleted event be reused.
+    """
+    if spec.get("request_id"):
+        return "b" + hashlib.sha1(str(spec["request_id"]).encode("utf-8")).hexdigest()
+    return "b" + uuid.uuid4().hex
+
+
+def _run_batches(service, calls, on_result):
+    """
+    Execute (key, request) pairs through batch HTTP requests in chunks of BATCH_SIZE.
+    Items failing with a retryable status are resent, with backoff, in a later round.
+    on_result(key, response, error) receives each final outcome.
+    """
+    pending = list(calls)
+    for attempt in range(BATCH_RETRIES + 1):
+        retry = []
+
+        def callback(request_id, response, exception):
+            key, request = chunk_map[request_id]
+            if (isinstance(exception, HttpError) and exception.status_code in RETRYABLE_STATUS
+                    and attempt < BATCH_RETRIES):
+                retry.append((key, request))
+            else:
+                on_result(key, response, exception)
+
+        for i in range(0, len(pending), BATCH_SIZE):
+            chunk_map = {str(n): item for n, item in enumerate(pending[i:i + BATCH_SIZE])}
+            batch = service.new_batch_http_request(callback=callback)
+            for request_id, (_, request) in chunk_map.items():
+                batch.add(request, request_id=request_id)
+            batch.execute()
+        if not retry:
+            return
+        pending = retry
+        time.sleep(2 ** attempt)
+
+
+def batch_create_events(specs):
+    """
+    Create many events on the primary calendar via batch requests.
+    Each spec: {summary, start_time, duration_minutes?, description?, location?, request_id?}
+    """
+    try:
+        service = get_calendar_service()
+        results = [None] * len(specs)
+        ids = [None] * len(specs)
+        calls = []
+        for i, spec in enumerate(specs):
+            try:
+                body = _event_body(spec["summary"], spec["start_time"], spec.get("duration_minutes", 60),
+                                   spec.get("description"), spec.get("location"))
+            except (KeyError, TypeError, ValueError) as error:
+                results[i] = {"index": i, "error": f"Invalid event spec: {error}"}
+                continue
+            body["id"] = ids[i] = _event_id(spec)
+            calls.append((i, service.events().insert(calendarId="primary", body=body)))
+
+        created, conflicts = [], []
+
+        def on_result(i, response, error):
+            if error is None:
+                created.append(response)
+                results[i] = {"index": i, "id": response.get("id"), "status": "created",
+                              "htmlLink": response.get("htmlLink")}
+            elif isinstance(error, HttpError) and error.status_code == 409:
+                conflicts.append(i)
+            else:
+                results[i] = {"index": i, "id": ids[i], "error": str(error)}
+
+        _run_batches(service, calls, on_result)
+        for i in conflicts:
+            # The id is taken: either an earlier attempt of this request inserted it,
+            # or it belongs to a deleted event and can never be used again
+            try:
+                existing = service.events().get(calendarId="primary", eventId=ids[i]).execute()
+            except HttpError as error:
+                results[i] = {"index": i, "id": ids[i], "error": str(error)}
+                continue
+            if existing.get("status") == "cancelled":
+                results[i] = {"index": i, "id": ids[i],
+                              "error": "Event id belongs to a deleted event; use a new request_id"}
+            else:
+                created.append(existing)
+                results[i] = {"index": i, "id": ids[i], "status": "exists", "htmlLink": existing.get("htmlLink")}
+        store.record("primary", created)
+        return {"results": results}
+
+    except HttpError as error:
+        return {"error": str(error)}
+
+
+def batch_delete_events(event_ids):
+    """Delete many events from the primary calendar via batch requests."""
+    try:
+        service = get_calendar_service()
+        results = [None] * len(event_ids)
+        calls = [(i, service.events().delete(calendarId="primary", eventId=event_id))
+                 for i, event_id in enumerate(event_ids)]
+
+        def on_result(i, response, error):
+            if error is None:
+                results[i] = {"id": event_ids[i], "status": "deleted"}
+            elif isinstance(error, HttpError) and error.status_code in (404, 410):
+                # Deleting twice is not an error for the caller
+                results[i] = {"id": event_ids[i], "status": "already_deleted"}
+            else:
+                results[i] = {"id": event_ids[i], "error": str(error)}
+
+        _run_batches(service, calls, on_result)
+        store.record("primary", [{"id": r["id"], "status": "cancelled"} for r in results if "status" in r])
+        return {"results": results}
+
     except HttpError as error:
         return {"error": str(error)}
 
@@ -40,18 +197,10 @@ def create_event(summary, start_time, duration_minutes=60, description=None, loc
     """Create a calendar event with the given details."""
     try:
         service = get_calendar_service()
-        start_dt = datetime.fromisoformat(start_time)
-        end_dt = start_dt + timedelta(minutes=duration_minutes)
-
-        event = {
-            "summary": summary,
-            "location": location,
-            "description": description,
-            "start": {"dateTime": start_dt.isoformat(), "timeZone": "UTC"},
-            "end": {"dateTime": end_dt.isoformat(), "timeZone": "UTC"},
-        }
+        event = _event_body(summary, start_time, duration_minutes, description, location)
 
         created_event = service.events().insert(calendarId="primary", body=event).execute()
+        store.record("primary", [created_event])
         # Return the event without printing (avoids encoding issues)
         return {"event": created_event}
 
@@ -64,6 +213,38 @@ def delete_event(event_id):
     try:
         service = get_calendar_service()
         service.events().delete(calendarId="primary", eventId=event_id).execute()
+        store.record("primary", [{"id": event_id, "status": "cancelled"}])
         return {"status": "deleted"}
     except HttpError as error:
-        return {"error": str(error)}
\ No newline at end of file
+        return {"error": str(error)}
+
+
+def find_free_slots(duration_minutes=30, time_min=None, time_max=None, calendar_ids=None,
+                    work_start="09:00", work_end="17:00", timezone_name="UTC",
+                    weekdays_only=True, limit=10):
+    """Free windows across calendars, answered from the local interval index."""
+    try:
+        calendar_ids = calendar_ids or ["primary"]
+        _ensure_synced(calendar_ids)
+        index = freebusy.build_index(calendar_ids, timezone_name)
+        time_min = time_min or datetime.now(timezone.utc).isoformat()
+        slots = freebusy.find_free_slots(index, duration_minutes, time_min, time_max, work_start,
+                                         work_end, timezone_name, weekdays_only, limit)
+        return {"slots": slots}
+    except (ValueError, KeyError) as error:
+        return {"error": f"Invalid argument: {error}"}
+    except HttpError as error:
+        return {"error": str(error)}
+
+
+def check_conflicts(start_times, duration_minutes=60, calendar_ids=None):
+    """Overlapping events for each candidate start time."""
+    try:
+        calendar_ids = calendar_ids or ["primary"]
+        _ensure_synced(calendar_ids)
+        index = freebusy.build_index(calendar_ids)
+        return {"candidates": freebusy.check_conflicts(index, start_times, duration_minutes)}
+    except ValueError as error:
+        return {"error": f"Invalid time: {error}"}
+    except HttpError as error:
+        return {"error": str(error)}
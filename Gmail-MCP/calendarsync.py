@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from googleapiclient.errors import HttpError
+
+# Local mirror of Google Calendar events.
+# One full sync per calendar, then incremental syncs driven by Calendar's nextSyncToken.
+CACHE_PATH = Path(os.getenv("CALENDAR_CACHE", "calendar_cache.json"))
+# Queries inside this window (seconds) are answered from the cache without any API call.
+SYNC_INTERVAL = float(os.getenv("CALENDAR_SYNC_INTERVAL", "60"))
+PAGE_SIZE = 2500
+
+
+def parse_time(value: str) -> float:
+    """ISO 8601 date or datetime -> UTC epoch seconds (naive values are treated as UTC)."""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def zone_for(name: str | None):
+    """tzinfo for an IANA zone name; UTC when missing or unknown."""
+    try:
+        return ZoneInfo(name) if name else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _edge(value: dict, zone) -> float:
+    if value.get("dateTime"):
+        return parse_time(value["dateTime"])
+    # All-day events run from local midnight to local midnight, not UTC midnight
+    return datetime.fromisoformat(value["date"]).replace(tzinfo=zone).timestamp()
+
+
+def event_bounds(event: dict, zone=timezone.utc):
+    """
+    (start, end) epoch seconds for a timed or all-day event, or None if it has no times.
+    All-day dates are read in `zone` (the calendar's or the caller's time zone).
+    """
+    try:
+        return _edge(event["start"], zone), _edge(event["end"], zone)
+    except (KeyError, ValueError):
+        return None
+
+
+def is_all_day(event: dict) -> bool:
+    return "date" in (event.get("start") or {}) and not event["start"].get("dateTime")
+
+
+def _fetch_changes(service, calendar_id: str, sync_token: str | None):
+    """Page through events().list; returns (items, next_sync_token, calendar time zone)."""
+    items, page_token = [], None
+    while True:
+        # Incremental results always include cancelled events, so deletions propagate.
+        params = {"calendarId": calendar_id, "singleEvents": True, "maxResults": PAGE_SIZE}
+        if sync_token:
+            params["syncToken"] = sync_token
+        if page_token:
+            params["pageToken"] = page_token
+        res = service.events().list(**params).execute()
+        items.extend(res.get("items", []))
+        page_token = res.get("nextPageToken")
+        if not page_token:
+            return items, res.get("nextSyncToken"), res.get("timeZone")
+
+
+class EventStore:
+    """Thread-safe, file-backed event cache keyed by calendar id and event id."""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._calendars = {}
+        self._index = {}
+        self._sync_locks = {}
+        # Bumped on every change so derived indexes know when to rebuild.
+        self.version = 0
+        self._load()
+
+    def _load(self):
+        try:
+            self._calendars = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._calendars = {}
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._calendars), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _state(self, calendar_id: str) -> dict:
+        return self._calendars.setdefault(
+            calendar_id, {"sync_token": None, "synced_at": 0.0, "events": {}})
+
+    def _apply(self, calendar_id: str, items):
+        events = self._state(calendar_id)["events"]
+        for item in items:
+            if item.get("status") == "cancelled":
+                events.pop(item.get("id"), None)
+            elif item.get("id"):
+                events[item["id"]] = item
+        self._index.pop(calendar_id, None)
+        self.version += 1
+
+    def needs_sync(self, calendar_id: str) -> bool:
+        with self._lock:
+            return time.time() - self._state(calendar_id)["synced_at"] >= SYNC_INTERVAL
+
+    def sync(self, service, calendar_id: str = "primary", force: bool = False):
+        """Bring one calendar up to date; full sync the first time or when the token expires."""
+        with self._lock:
+            sync_lock = self._sync_locks.setdefault(calendar_id, threading.Lock())
+        # Network fetches run under a per-calendar lock so cache reads are never blocked.
+        with sync_lock:
+            with self._lock:
+                state = self._state(calendar_id)
+                if not force and time.time() - state["synced_at"] < SYNC_INTERVAL:
+                    return
+                token = state["sync_token"]
+            try:
+                items, next_token, time_zone = _fetch_changes(service, calendar_id, token)
+            except HttpError as e:
+                # 410 Gone: the sync token is no longer valid, start over
+                if e.status_code != 410:
+                    raise
+                token = None
+                items, next_token, time_zone = _fetch_changes(service, calendar_id, None)
+            with self._lock:
+                if token is None:
+                    state["events"] = {}
+                if time_zone and time_zone != state.get("time_zone"):
+                    state["time_zone"] = time_zone
+                    self._index.pop(calendar_id, None)
+                    self.version += 1
+                self._apply(calendar_id, items)
+                state["sync_token"] = next_token
+                state["synced_at"] = time.time()
+                self._save()
+
+    def record(self, calendar_id: str, items):
+        """Write-through for events this process created or deleted."""
+        with self._lock:
+            self._apply(calendar_id, items)
+            self._save()
+
+    def events(self, calendar_id: str):
+        """Snapshot of (start, end, event) tuples for a calendar, sorted by start."""
+        with self._lock:
+            return list(self._sorted(calendar_id)[1])
+
+    def time_zone(self, calendar_id: str):
+        """The calendar's time zone as reported by the last sync (UTC until known)."""
+        with self._lock:
+            return zone_for(self._state(calendar_id).get("time_zone"))
+
+    def _sorted(self, calendar_id: str):
+        index = self._index.get(calendar_id)
+        if index is None:
+            rows = []
+            state = self._state(calendar_id)
+            zone = zone_for(state.get("time_zone"))
+            for event in state["events"].values():
+                bounds = event_bounds(event, zone)
+                if bounds:
+                    rows.append((bounds[0], bounds[1], event))
+            rows.sort(key=lambda r: r[0])
+            longest = max((r[1] - r[0] for r in rows), default=0.0)
+            index = self._index[calendar_id] = ([r[0] for r in rows], rows, longest)
+        return index
+
+    def query(self, calendar_ids, time_min: float, time_max: float | None = None, limit: int | None = None):
+        """Events overlapping [time_min, time_max) across calendars, ordered by start time."""
+        out = []
+        with self._lock:
+            for calendar_id in calendar_ids:
+                starts, rows, longest = self._sorted(calendar_id)
+                lo = bisect_left(starts, time_min - longest)
+                hi = len(starts) if time_max is None else bisect_left(starts, time_max)
+                for start, end, event in rows[lo:hi]:
+                    if end > time_min:
+                        out.append((start, calendar_id, event))
+        out.sort(key=lambda r: r[0])
+        if limit is not None:
+            out = out[:limit]
+        return [dict(event, calendarId=calendar_id) for _, calendar_id, event in out]
+
+
+store = EventStore()
@@ -0,0 +1,142 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+from calendarsync import store, parse_time, event_bounds, is_all_day
+
+MAX_DAYS = 366
+
+
+class IntervalIndex:
+    """
+    Busy intervals sorted by start, with a running maximum of end times.
+    Overlap lookups are a bisect plus a short backwards walk that stops as soon
+    as no earlier interval can reach the query window.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda r: r[0])
+        self.starts = [r[0] for r in rows]
+        self.ends = [r[1] for r in rows]
+        self.items = [r[2] for r in rows]
+        self.max_end = []
+        reach = float("-inf")
+        for end in self.ends:
+            reach = max(reach, end)
+            self.max_end.append(reach)
+
+    def overlapping(self, lo: float, hi: float):
+        """Indices of intervals intersecting [lo, hi), in start order."""
+        out = []
+        j = bisect_left(self.starts, hi) - 1
+        while j >= 0 and self.max_end[j] > lo:
+            if self.ends[j] > lo:
+                out.append(j)
+            j -= 1
+        out.reverse()
+        return out
+
+    def busy(self, lo: float, hi: float):
+        """Merged busy blocks clipped to [lo, hi)."""
+        merged = []
+        for j in self.overlapping(lo, hi):
+            s, e = max(self.starts[j], lo), min(self.ends[j], hi)
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        return merged
+
+
+def _blocks_time(event: dict) -> bool:
+    if event.get("transparency") == "transparent":
+        return False
+    for attendee in event.get("attendees", []):
+        if attendee.get("self") and attendee.get("responseStatus") == "declined":
+            return False
+    return True
+
+
+_cache = {}
+
+
+def build_index(calendar_ids, tz: str | None = None) -> IntervalIndex:
+    """
+    Index over the cached events of the given calendars, rebuilt only when the cache changes.
+    All-day events cover local midnight to midnight in `tz`, or in each calendar's own zone.
+    """
+    key = (tuple(sorted(calendar_ids)), tz)
+    cached = _cache.get(key)
+    if cached and cached[0] == store.version:
+        return cached[1]
+    version = store.version
+    zone = ZoneInfo(tz) if tz else None
+    rows = []
+    for calendar_id in key[0]:
+        for start, end, event in store.events(calendar_id):
+            if not _blocks_time(event):
+                continue
+            if zone is not None and is_all_day(event):
+                start, end = event_bounds(event, zone)
+            rows.append((start, end, dict(event, calendarId=calendar_id)))
+    index = IntervalIndex(rows)
+    _cache[key] = (version, index)
+    return index
+
+
+def _parse_hhmm(value: str) -> dtime:
+    hours, minutes = value.split(":")
+    return dtime(int(hours), int(minutes))
+
+
+def find_free_slots(index: IntervalIndex, duration_minutes: int, time_min: str, time_max: str = None,
+                    work_start: str = "09:00", work_end: str = "17:00", tz: str = "UTC",
+                    weekdays_only: bool = True, limit: int = 10):
+    """Free windows of at least `duration_minutes` inside working hours, earliest first."""
+    if duration_minutes <= 0:
+        raise ValueError(f"duration_minutes must be positive, got {duration_minutes}")
+    zone = ZoneInfo(tz)
+    lo = parse_time(time_min)
+    hi = parse_time(time_max) if time_max else lo + 7 * 86400
+    need = duration_minutes * 60
+    day_start, day_end = _parse_hhmm(work_start), _parse_hhmm(work_end)
+
+    slots = []
+    day = datetime.fromtimestamp(lo, zone).date()
+    last = datetime.fromtimestamp(hi, zone).date()
+    for _ in range(MAX_DAYS):
+        if day > last or len(slots) >= limit:
+            break
+        if not (weekdays_only and day.weekday() >= 5):
+            win_lo = max(lo, datetime.combine(day, day_start, zone).timestamp())
+            win_hi = min(hi, datetime.combine(day, day_end, zone).timestamp())
+            cursor = win_lo
+            for s, e in index.busy(win_lo, win_hi) + [[win_hi, win_hi]]:
+                if s - cursor >= need:
+                    slots.append({
+                        "start": datetime.fromtimestamp(cursor, zone).isoformat(),
+                        "end": datetime.fromtimestamp(s, zone).isoformat(),
+                    })
+                    if len(slots) >= limit:
+                        break
+                cursor = max(cursor, e)
+        day += timedelta(days=1)
+    return slots
+
+
+def check_conflicts(index: IntervalIndex, start_times, duration_minutes: int = 60):
+    """For each candidate start, the cached events it would overlap."""
+    out = []
+    for start_time in start_times:
+        lo = parse_time(start_time)
+        hi = lo + duration_minutes * 60
+        conflicts = [index.items[j] for j in index.overlapping(lo, hi)]
+        out.append({
+            "start": start_time,
+            "free": not conflicts,
+            "conflicts": [
+                {"id": e.get("id"), "summary": e.get("summary"), "start": e.get("start"),
+                 "end": e.get("end"), "calendarId": e.get("calendarId")}
+                for e in conflicts
+            ],
+        })
+    return out
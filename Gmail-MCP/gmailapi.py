@@ -1,23 +1,141 @@
+import os
+import time
 import base64
+import threading
+from string import Template
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from typing import Optional, List, Dict
 from googleapiclient.errors import HttpError
 from auth import auth_gmail
 from email.utils import getaddresses, parseaddr, formatdate, make_msgid
 
-def send_email(to: str, subject: str, body: str, html: bool=False)-> dict:
-    svc = auth_gmail()
+# messages.send costs 100 quota units against a 250 units/sec per-user budget,
+# so ~2 sends per second is the sustainable rate.
+SEND_RATE_PER_SEC = float(os.getenv("GMAIL_SEND_RATE", "2"))
+SEND_RETRIES = 3
+# Only a rate-limit rejection is retried automatically: a send is not idempotent, and a
+# server error may arrive after the message was accepted, so resending could mail it twice.
+AUTO_RETRY_STATUS = {429}
+# Failures the caller may choose to resend (server errors possibly after delivery).
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_BULK_CONCURRENCY = 10
+
+
+class _RateLimiter:
+    """Thread-safe pacer that hands out at most `rate` slots per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / max(rate, 0.01)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            slot = max(time.monotonic(), self._next)
+            self._next = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+_send_limiter = _RateLimiter(SEND_RATE_PER_SEC)
+_local = threading.local()
+
+
+def _thread_service():
+    """Gmail client for the current thread (httplib2 transports are not thread-safe)."""
+    svc = getattr(_local, "svc", None)
+    if svc is None:
+        svc = _local.svc = auth_gmail()
+    return svc
+
+
+def _build_raw(to: str, subject: str, body: str, html: bool = False) -> str:
     msg = MIMEText(body, _subtype="html" if html else "plain")
     msg["to"] = to
     msg["subject"] = subject
-    raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
+    return base64.urlsafe_b64encode(msg.as_bytes()).decode()
+
+
+def _send_raw(svc, body: dict) -> dict:
+    """
+    Send a prepared message through the shared quota limiter.
+    Rate-limit (429) errors are retried with exponential backoff; server errors are raised.
+    """
+    for attempt in range(SEND_RETRIES + 1):
+        _send_limiter.wait()
+        try:
+            return svc.users().messages().send(userId="me", body=body).execute()
+        except HttpError as e:
+            if e.status_code not in AUTO_RETRY_STATUS or attempt == SEND_RETRIES:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def send_email(to: str, subject: str, body: str, html: bool=False)-> dict:
+    svc = auth_gmail()
+    raw = _build_raw(to, subject, body, html)
 
     try:
-        res = svc.users().messages().send(userId="me", body={"raw": raw}).execute()
+        res = _send_raw(svc, {"raw": raw})
         return {"id": res["id"]}
     except HttpError as e:
         return {"error": {"type": "GMAIL_HTTP_ERROR", "status" : e.status_code, "detail": str(e)}}
 
+
+def _send_one(index: int, subject: Template, body: Template, variables: Dict, html: bool) -> dict:
+    to = (variables or {}).get("to")
+    result = {"index": index, "to": to}
+    if not to:
+        result["error"] = {"type": "INVALID_RECIPIENT", "detail": "Recipient entry has no 'to' address"}
+        result["retryable"] = False
+        return result
+    try:
+        raw = _build_raw(to, subject.substitute(variables), body.substitute(variables), html)
+    except (KeyError, ValueError) as e:
+        result["error"] = {"type": "TEMPLATE_ERROR", "detail": f"Cannot render template: {e}"}
+        result["retryable"] = False
+        return result
+    try:
+        res = _send_raw(_thread_service(), {"raw": raw})
+        result["id"] = res["id"]
+    except HttpError as e:
+        result["error"] = {"type": "GMAIL_HTTP_ERROR", "status": e.status_code, "detail": str(e)}
+        result["retryable"] = e.status_code in RETRYABLE_STATUS
+    except Exception as e:
+        result["error"] = {"type": "SEND_FAILED", "detail": str(e)}
+        result["retryable"] = True
+    return result
+
+
+def send_bulk(subject: str, body: str, recipients: List[Dict], html: bool = False,
+              max_concurrency: int = 4) -> dict:
+    """
+    Mail-merge send: render `subject`/`body` ($name placeholders) once per recipient
+    variable set and send each message. Rendering and encoding run in a worker pool;
+    sends share the quota limiter so the batch proceeds at the API's sustainable rate.
+    Failed entries flagged retryable are returned under "retry" so they can be resent.
+    """
+    if not recipients:
+        return {"error": {"type": "INVALID_ARGUMENT", "detail": "Provide at least one recipient"}}
+    subject_tpl, body_tpl = Template(subject), Template(body)
+    workers = max(1, min(int(max_concurrency), MAX_BULK_CONCURRENCY, len(recipients)))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda item: _send_one(item[0], subject_tpl, body_tpl, item[1], html),
+            enumerate(recipients),
+        ))
+
+    failed = [r for r in results if "error" in r]
+    return {
+        "sent": len(results) - len(failed),
+        "failed": len(failed),
+        "results": results,
+        "retry": [recipients[r["index"]] for r in failed if r.get("retryable")],
+    }
+
 def search_emails(query: str= "", limit: int = 10) -> dict:
     svc = auth_gmail()
     try:
@@ -156,10 +274,7 @@ def gmail_reply(thread_id: str, body: str, html: bool = False, reply_all: bool =
 
         raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
 
-        sent = svc.users().messages().send(
-            userId="me",
-            body={"raw": raw, "threadId": thread_id}
-        ).execute()
+        sent = _send_raw(svc, {"raw": raw, "threadId": thread_id})
 
         return {"id": sent.get("id"), "threadId": sent.get("threadId")}
     except HttpError as e:
@@ -2,11 +2,13 @@ import os
 import json
 import asyncio
 from mcp.server.fastmcp import FastMCP
+from mcp_common.transport import run
 
 # Your modules
 # Keep these imports exactly matching your structure
-from gmailapi import send_email, search_emails, gmail_delete, gmail_list_unread, gmail_reply
-from calendarapi import list_upcoming_events, create_event, delete_event
+from gmailapi import send_email, send_bulk, search_emails, gmail_delete, gmail_list_unread, gmail_reply
+from calendarapi import (list_upcoming_events, create_event, delete_event, find_free_slots, check_conflicts,
+                         batch_create_events, batch_delete_events)
 # Optional: .env support if you want GOOGLE_CREDENTIALS_FILE/GOOGLE_TOKEN_FILE
 try:
     from dotenv import load_dotenv
@@ -31,6 +33,26 @@ async def gmail_send(to: str, subject: str, body: str, html: bool = False) -> di
     # send_email is synchronous — run in thread
     return await asyncio.to_thread(send_email, to=to, subject=subject, body=body, html=html)
 
+@mcp.tool()
+async def gmail_send_bulk(subject: str, body: str, recipients: list[dict], html: bool = False,
+                          max_concurrency: int = 4) -> dict:
+    """
+    Send one templated email per recipient (mail merge).
+    Args:
+      subject: subject template, e.g. 'Welcome, $name'
+      body: body template using $placeholders filled from each recipient entry
+      recipients: list of variable sets, each with a 'to' address,
+                  e.g. [{"to": "a@x.com", "name": "Ann"}, ...]
+      html: set True if body is HTML
+      max_concurrency: worker threads rendering and sending (capped at 10)
+    Returns:
+      { "sent": n, "failed": m, "results": [ {index, to, id | error, retryable}, ... ],
+        "retry": [ recipient entries that can be passed back to retry ] }
+      Entries that failed with a 5xx are retryable but may already have been delivered;
+      check the Sent folder before passing them back.
+    """
+    return await asyncio.to_thread(send_bulk, subject, body, recipients, html, max_concurrency)
+
 @mcp.tool()
 async def gmail_search(query: str = "", limit: int = 10) -> dict:
     """
@@ -72,15 +94,56 @@ async def gmail_reply_tool(thread_id: str, body: str, html: bool = False, reply_
     return await asyncio.to_thread(gmail_reply, thread_id, body, html, reply_all)
 
 @mcp.tool()
-async def calendar_list_tool(limit: int = 10) -> dict:
+async def calendar_list_tool(limit: int = 10, time_min: str = None, time_max: str = None,
+                             calendar_ids: list[str] = None, refresh: bool = False) -> dict:
     """
-    List upcoming Google Calendar events.
+    List Google Calendar events from the locally synced event cache.
     Args:
       limit: maximum number of events to retrieve (default 10)
+      time_min: ISO 8601 window start (default: now)
+      time_max: ISO 8601 window end (default: no limit)
+      calendar_ids: calendars to include (default ['primary'])
+      refresh: force an incremental sync before answering
+    Returns:
+      { "events": [ {id, summary, start, end, htmlLink, calendarId, ...}, ... ] }
+    """
+    return await asyncio.to_thread(list_upcoming_events, limit, time_min, time_max, calendar_ids, refresh)
+
+@mcp.tool()
+async def calendar_find_free_slots(duration_minutes: int = 30, time_min: str = None, time_max: str = None,
+                                   calendar_ids: list[str] = None, work_start: str = "09:00",
+                                   work_end: str = "17:00", timezone: str = "UTC",
+                                   weekdays_only: bool = True, limit: int = 10) -> dict:
+    """
+    Find free time windows across one or more calendars.
+    Args:
+      duration_minutes: minimum length of a free window (positive)
+      time_min: ISO 8601 search start (default: now)
+      time_max: ISO 8601 search end (default: 7 days after time_min)
+      calendar_ids: calendars whose events count as busy (default ['primary'])
+      work_start / work_end: working hours as 'HH:MM' in `timezone`
+      timezone: IANA zone name, e.g. 'America/New_York'; all-day events block whole days in this zone
+      weekdays_only: skip Saturdays and Sundays
+      limit: maximum number of windows to return
     Returns:
-      { "events": [ {id, summary, start, end, htmlLink, ...}, ... ] }
+      { "slots": [ {start, end}, ... ] } or { "error": ... }
     """
-    return await asyncio.to_thread(list_upcoming_events, limit)
+    return await asyncio.to_thread(find_free_slots, duration_minutes, time_min, time_max, calendar_ids,
+                                   work_start, work_end, timezone, weekdays_only, limit)
+
+@mcp.tool()
+async def calendar_check_conflicts(start_times: list[str], duration_minutes: int = 60,
+                                   calendar_ids: list[str] = None) -> dict:
+    """
+    Check candidate meeting times against existing events.
+    Args:
+      start_times: ISO 8601 candidate start times
+      duration_minutes: meeting length
+      calendar_ids: calendars to check (default ['primary'])
+    Returns:
+      { "candidates": [ {start, free, conflicts: [ {id, summary, start, end, calendarId} ]}, ... ] }
+    """
+    return await asyncio.to_thread(check_conflicts, start_times, duration_minutes, calendar_ids)
 
 @mcp.tool()
 async def calendar_create_tool(summary: str, start_time: str, duration_minutes: int = 60,
@@ -116,7 +179,31 @@ async def calendar_delete_tool(event_id: str) -> dict:
     """
     return await asyncio.to_thread(delete_event, event_id)
 
+@mcp.tool()
+async def calendar_batch_create_tool(events: list[dict]) -> dict:
+    """
+    Create many calendar events in batched API requests.
+    Args:
+      events: list of {summary, start_time, duration_minutes?, description?, location?, request_id?}
+              (request_id makes retries idempotent: resending the same request_id reports
+               'exists' instead of creating a duplicate; without it every call creates new events)
+    Returns:
+      { "results": [ {index, id, status: created|exists, htmlLink} | {index, error}, ... ] }
+    """
+    return await asyncio.to_thread(batch_create_events, events)
+
+@mcp.tool()
+async def calendar_batch_delete_tool(event_ids: list[str]) -> dict:
+    """
+    Delete many calendar events in batched API requests.
+    Args:
+      event_ids: IDs of the events to delete
+    Returns:
+      { "results": [ {id, status: deleted|already_deleted} | {id, error}, ... ] }
+    """
+    return await asyncio.to_thread(batch_delete_events, event_ids)
+
 if __name__ == "__main__":
-    # Claude/clients will connect via stdio
-    mcp.run(transport="stdio")
+    # Claude/clients connect via stdio, or over HTTP with MCP_TRANSPORT=http
+    run(mcp, port=8101)
 
@@ -0,0 +1,85 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+TOTAL_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "30"))
+
+
+class HttpClient:
+    """
+    One shared aiohttp session per process (per event loop), created lazily on first use.
+    The connector keeps connections alive and caches DNS, so repeated calls to the
+    same API reuse warm TCP/TLS connections instead of paying setup every time.
+    """
+
+    def __init__(self):
+        # event loop -> (session, shutdown guard). A session is bound to the loop it was
+        # created on; tests or a restarted server may bring a new loop, which gets its own pool.
+        self._sessions = {}
+        self.holders = 0
+
+    def session(self) -> ClientSession:
+        loop = asyncio.get_running_loop()
+        entry = self._sessions.get(loop)
+        if entry is None or entry[0].closed:
+            connector = TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_TTL,
+                keepalive_timeout=KEEPALIVE,
+            )
+            session = ClientSession(
+                connector=connector,
+                timeout=ClientTimeout(total=TOTAL_TIMEOUT, connect=CONNECT_TIMEOUT),
+            )
+            guard = loop.create_task(self._close_with_loop(loop, session))
+            entry = self._sessions[loop] = (session, guard)
+        return entry[0]
+
+    async def _close_with_loop(self, loop, session: ClientSession):
+        # Parked until the loop shuts down: asyncio.run() and anyio cancel leftover tasks
+        # before closing the loop, so a pool nobody closed is still closed on its own loop.
+        try:
+            await asyncio.Future()
+        finally:
+            if self._sessions.get(loop, (None,))[0] is session:
+                del self._sessions[loop]
+            await session.close()
+
+    async def close(self):
+        """Close the current event loop's pool."""
+        entry = self._sessions.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            session, guard = entry
+            guard.cancel()
+            await session.close()
+
+
+client = HttpClient()
+
+
+def get_session() -> ClientSession:
+    """The process-wide pooled session. Do not close it; use it per request."""
+    return client.session()
+
+
+@asynccontextmanager
+async def http_lifespan(server):
+    """
+    FastMCP lifespan that closes the shared pool when the server stops.
+    Over HTTP the lifespan runs once per client session, so the pool is only
+    closed when the last holder exits.
+    """
+    client.holders += 1
+    try:
+        yield {}
+    finally:
+        client.holders -= 1
+        if client.holders == 0:
+            await client.close()
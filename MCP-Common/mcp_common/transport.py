@@ -0,0 +1,131 @@
+import os
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from mcp_common.http import http_lifespan
+
+# MCP_TRANSPORT=stdio (default) keeps the one-client-per-process behaviour.
+# MCP_TRANSPORT=http serves streamable HTTP: one long-lived process shared by many
+# clients, so caches and the connection pool stay warm across users.
+TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio").lower()
+HOST = os.getenv("MCP_HOST", "127.0.0.1")
+PORT = os.getenv("MCP_PORT")
+PATH = os.getenv("MCP_PATH", "/mcp")
+# Concurrent requests one client session may have in flight; extra requests queue.
+CLIENT_CONCURRENCY = int(os.getenv("MCP_CLIENT_CONCURRENCY", "4"))
+# Seconds a queued request waits for a slot before it is answered with 429.
+CLIENT_QUEUE_TIMEOUT = float(os.getenv("MCP_CLIENT_QUEUE_TIMEOUT", "30"))
+# Seconds in-flight requests get to finish after SIGINT/SIGTERM before they are cancelled.
+SHUTDOWN_TIMEOUT = float(os.getenv("MCP_SHUTDOWN_TIMEOUT", "15"))
+# Answer tool calls with plain JSON instead of a per-request SSE stream. SSE responses
+# are torn down as soon as shutdown starts, so JSON is what lets in-flight calls drain.
+JSON_RESPONSE = os.getenv("MCP_JSON_RESPONSE", "1").lower() not in ("0", "false", "no")
+
+HTTP_TRANSPORTS = ("http", "streamable-http", "streamable_http")
+
+
+class ClientLimiter:
+    """
+    ASGI middleware bounding concurrent POSTs (tool calls) per MCP session, keyed on
+    the mcp-session-id header, or on the client address before a session exists.
+    GET (the server-to-client event stream) and DELETE are not counted.
+    """
+
+    def __init__(self, app, limit: int = CLIENT_CONCURRENCY, timeout: float = CLIENT_QUEUE_TIMEOUT):
+        self.app = app
+        self.limit = limit
+        self.timeout = timeout
+        self._slots = {}
+
+    def _key(self, scope) -> str:
+        for name, value in scope.get("headers", ()):
+            if name == b"mcp-session-id":
+                return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "-"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or self.limit <= 0:
+            return await self.app(scope, receive, send)
+        key = self._key(scope)
+        slot = self._slots.setdefault(key, [asyncio.Semaphore(self.limit), 0])
+        slot[1] += 1
+        try:
+            try:
+                await asyncio.wait_for(slot[0].acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                return await self._busy(send)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                slot[0].release()
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                self._slots.pop(key, None)
+
+    async def _busy(self, send):
+        body = json.dumps({"jsonrpc": "2.0", "id": None, "error": {
+            "code": -32000, "message": f"Too many concurrent requests for this client (limit {self.limit})"}}).encode()
+        await send({"type": "http.response.start", "status": 429, "headers": [
+            (b"content-type", b"application/json"), (b"retry-after", b"1"),
+            (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def http_app(server, path: str = PATH):
+    """Streamable HTTP ASGI app for a FastMCP (mcp or fastmcp 2.x) or low-level MCP server."""
+    if hasattr(server, "http_app"):  # fastmcp 2.x
+        return server.http_app(path=path, transport="http", json_response=JSON_RESPONSE)
+    if hasattr(server, "streamable_http_app"):  # mcp.server.fastmcp
+        server.settings.streamable_http_path = path
+        server.settings.json_response = JSON_RESPONSE
+        return server.streamable_http_app()
+
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+
+    manager = StreamableHTTPSessionManager(app=server, json_response=JSON_RESPONSE)
+
+    class Endpoint:
+        # A class instance, so Starlette routes the raw ASGI call instead of wrapping a Request
+        async def __call__(self, scope, receive, send):
+            await manager.handle_request(scope, receive, send)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with manager.run():
+            yield
+
+    return Starlette(routes=[Route(path, endpoint=Endpoint())], lifespan=lifespan)
+
+
+async def serve_http(server, port: int = 8000, host: str = HOST):
+    """
+    Serve `server` over streamable HTTP until SIGINT/SIGTERM. On shutdown the listener
+    closes, in-flight requests get SHUTDOWN_TIMEOUT seconds to finish, then sessions
+    and the shared HTTP pool are closed.
+    """
+    import uvicorn
+
+    config = uvicorn.Config(
+        ClientLimiter(http_app(server)),
+        host=host,
+        port=int(PORT or port),
+        timeout_graceful_shutdown=SHUTDOWN_TIMEOUT,
+        log_level=os.getenv("MCP_LOG_LEVEL", "info").lower(),
+    )
+    # Hold the pool open for the life of the process; per-session lifespans only borrow it
+    async with http_lifespan(server):
+        await uvicorn.Server(config).serve()
+
+
+def run(server, port: int = 8000):
+    """Run a FastMCP server over MCP_TRANSPORT (stdio or http); `port` is the default for http."""
+    if TRANSPORT in HTTP_TRANSPORTS:
+        asyncio.run(serve_http(server, port))
+    elif TRANSPORT == "stdio":
+        server.run(transport="stdio")
+    else:
+        raise SystemExit(f"Unknown MCP_TRANSPORT '{TRANSPORT}'; use 'stdio' or 'http'")
@@ -1,50 +1,113 @@
+import os
+import time
+import asyncio
 import urllib.parse
-from aiohttp import ClientSession, ClientResponseError
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from aiohttp import ClientResponseError
 import feedparser
 from mcp.server.fastmcp import FastMCP
+from mcp_common.http import get_session, http_lifespan
+from mcp_common.transport import run
+from news_user.watchlist import Watchlist
 
-mcp = FastMCP("News-MCP-User")
+mcp = FastMCP("News-MCP-User", lifespan=http_lifespan)
 
-def _normalize_entries(entries):
+# Parsed feeds keyed by URL, revalidated with ETag / Last-Modified.
+# Within FEED_MIN_REFRESH seconds the cached copy is used without any request.
+FEED_MIN_REFRESH = float(os.getenv("NEWS_FEED_MIN_REFRESH", "60"))
+FEED_CACHE_SIZE = 256
+PARSE_WORKERS = int(os.getenv("NEWS_PARSE_WORKERS", "2"))
+GOOGLE_NEWS_RSS_URL = os.getenv("GOOGLE_NEWS_RSS_URL", "https://news.google.com/rss/search")
+_ENTRY_FIELDS = ("title", "source", "link", "published", "summary")
+
+_feeds = {}
+_parse_pool = None
+
+def _parse_entries(data: bytes):
+    # Runs in a worker process: feedparser is pure Python and would block the event loop
+    feed = feedparser.parse(data)
+    entries = feed.entries if hasattr(feed, "entries") else []
+    return [{k: dict(v) if isinstance(v, dict) else v for k in _ENTRY_FIELDS for v in [e.get(k)]}
+            for e in entries]
+
+async def _parse_off_loop(data: bytes):
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return await asyncio.get_running_loop().run_in_executor(_parse_pool, _parse_entries, data)
+
+def _normalize_entries(entries, limit=None):
     out = []
-    for e in entries or []:
+    for e in islice(entries or [], limit):
         # Some RSS items may miss a few fields; guard accordingly
-        source = getattr(e, "source", None)
+        source = e.get("source")
         source_name = source.get("title") if isinstance(source, dict) else "Google News"
         out.append({
-            "title": getattr(e, "title", "").strip(),
+            "title": (e.get("title") or "").strip(),
             "source": source_name or "Google News",
-            "url": getattr(e, "link", None),
-            "publishedAt": getattr(e, "published", None),
-            "description": getattr(e, "summary", None),
+            "url": e.get("link"),
+            "publishedAt": e.get("published"),
+            "description": e.get("summary"),
         })
     return out
 
-async def _fetch_rss(query: str, hl: str, gl: str, ceid: str):
+def _remember_feed(url: str, entry: dict):
+    _feeds.pop(url, None)
+    if len(_feeds) >= FEED_CACHE_SIZE:
+        _feeds.pop(next(iter(_feeds)))
+    _feeds[url] = entry
+
+async def _fetch_feed(url: str):
+    """
+    Parsed entries for a feed URL, using a conditional GET against the cached copy.
+    Returns (entries, None) or (None, error_payload).
+    """
+    cached = _feeds.get(url)
+    if cached and time.monotonic() - cached["checked_at"] < FEED_MIN_REFRESH:
+        return cached["entries"], None
+
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    async with get_session().get(url, headers=headers) as resp:
+        if resp.status == 304 and cached:
+            cached["checked_at"] = time.monotonic()
+            return cached["entries"], None
+        try:
+            resp.raise_for_status()
+        except ClientResponseError:
+            text = await resp.text()
+            return None, {"error": f"HTTP {resp.status}", "details": text, "via": "google-news-rss"}
+        # Read the raw feed text and parse
+        data = await resp.read()
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+    entries = await _parse_off_loop(data)
+    _remember_feed(url, {"entries": entries, "etag": etag, "last_modified": last_modified,
+                         "checked_at": time.monotonic()})
+    return entries, None
+
+async def _fetch_rss(query: str, hl: str, gl: str, ceid: str, limit: int | None = None):
     """
     Fetch Google News RSS with aiohttp and parse with feedparser.
-    No API key required.
+    No API key required. Only the first `limit` entries are normalized.
     """
     qs = urllib.parse.urlencode({"q": query, "hl": hl, "gl": gl, "ceid": ceid})
-    url = f"https://news.google.com/rss/search?{qs}"
-
-    async with ClientSession() as session:
-        async with session.get(url) as resp:
-            try:
-                resp.raise_for_status()
-            except ClientResponseError:
-                text = await resp.text()
-                return {"error": f"HTTP {resp.status}", "details": text, "via": "google-news-rss"}
-            # Read the raw feed text and parse
-            data = await resp.read()
-            feed = feedparser.parse(data)
-            entries = feed.entries if hasattr(feed, "entries") else []
-            articles = _normalize_entries(entries)
-            return {
-                "total": len(articles),
-                "articles": articles,
-                "via": "google-news-rss",
-            }
+    url = f"{GOOGLE_NEWS_RSS_URL}?{qs}"
+
+    entries, error = await _fetch_feed(url)
+    if error:
+        return error
+    articles = _normalize_entries(entries, limit)
+    return {
+        "total": len(articles),
+        "articles": articles,
+        "via": "google-news-rss",
+    }
 
 @mcp.tool()
 async def get_latest_news_about(query: str,
@@ -67,15 +130,65 @@ async def get_latest_news_about(query: str,
     if not q:
         return {"error": "Provide a non-empty 'query'."}
 
-    payload = await _fetch_rss(q, hl, gl, ceid)
-    if payload.get("error"):
-        return payload
-
-    # apply max_results trimming here to keep transport light
+    # apply max_results trimming up front so only the returned entries get normalized
     n = max(1, min(int(max_results), 50))
-    payload["articles"] = payload.get("articles", [])[:n]
-    payload["total"] = len(payload["articles"])
+    payload = await _fetch_rss(q, hl, gl, ceid, limit=n)
     return payload
 
+watchlist = Watchlist(_fetch_rss)
+
+@mcp.tool()
+async def watch_news(query: str, hl: str = "en-US", gl: str = "US", ceid: str = "US:en"):
+    """
+    Register a topic to be polled in the background.
+    Articles already in the feed now are treated as seen; later ones are
+    collected for get_new_articles. Polling speeds up for busy topics and
+    slows down for quiet ones.
+    Returns: { id, query, interval, last_polled, pending }
+    """
+    q = (query or "").strip()
+    if not q:
+        return {"error": "Provide a non-empty 'query'."}
+    watchlist.ensure_running()
+    return watchlist.add(q, hl, gl, ceid)
+
+@mcp.tool()
+async def list_watches():
+    """
+    List registered watches with their polling interval and number of undelivered articles.
+    """
+    watchlist.ensure_running()
+    return {"watches": [watchlist.describe(wid) for wid in watchlist.watches]}
+
+@mcp.tool()
+async def unwatch_news(watch_id: str):
+    """
+    Stop watching a topic.
+    """
+    if not watchlist.remove(watch_id):
+        return {"error": f"Unknown watch id: {watch_id}"}
+    return {"id": watch_id, "status": "removed"}
+
+@mcp.tool()
+async def get_new_articles(watch_id: str, max_results: int = 20, refresh: bool = False):
+    """
+    Return only articles for a watch that have not been delivered before.
+    Args:
+      - watch_id: id returned by watch_news
+      - max_results: maximum number of articles to return (the rest stay queued)
+      - refresh: poll the feed now instead of waiting for the background scheduler
+    Returns:
+      { id, query, articles: [ {title, source, url, publishedAt, description} ], remaining }
+    """
+    if watch_id not in watchlist.watches:
+        return {"error": f"Unknown watch id: {watch_id}"}
+    watchlist.ensure_running()
+    w = watchlist.watches[watch_id]
+    if refresh or w["last_polled"] is None:
+        await watchlist.poll(watch_id)
+    articles = watchlist.take(watch_id, max(1, min(int(max_results), 50)))
+    return {"id": watch_id, "query": w["query"], "articles": articles,
+            "remaining": len(w["pending"])}
+
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    run(mcp, port=8104)
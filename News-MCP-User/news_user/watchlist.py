@@ -0,0 +1,183 @@
+import os
+import json
+import math
+import time
+import asyncio
+import hashlib
+import secrets
+
+# Registered queries are polled in the background; articles not delivered before
+# are buffered until get_new_articles drains them. Delivered article ids live in a
+# Bloom filter shared by all watches but keyed per watch ("<watch id>|<article id>"),
+# so "seen" stays compact no matter how long a watch runs.
+WATCHLIST_PATH = os.getenv("NEWS_WATCHLIST_PATH", "watchlist.json")
+SEEN_PATH = os.getenv("NEWS_WATCHLIST_SEEN_PATH", "watchlist_seen.bin")
+MIN_INTERVAL = float(os.getenv("NEWS_WATCH_MIN_INTERVAL", "120"))
+MAX_INTERVAL = float(os.getenv("NEWS_WATCH_MAX_INTERVAL", "3600"))
+MAX_PENDING = 200
+SEEN_CAPACITY = 200_000
+SEEN_ERROR_RATE = 1e-4
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over a bytearray, persisted as raw bytes."""
+
+    def __init__(self, capacity: int = SEEN_CAPACITY, error_rate: float = SEEN_ERROR_RATE, path: str = SEEN_PATH):
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        nbytes = (self.size + 7) // 8
+        self.bits = bytearray(data) if len(data) == nbytes else bytearray(nbytes)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str):
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.bits)
+        os.replace(tmp, self.path)
+
+
+def article_id(article: dict) -> str:
+    return article.get("url") or f"{article.get('title')}|{article.get('publishedAt')}"
+
+
+def seen_key(watch_id: str, aid: str) -> str:
+    """Bloom filter entry for an article delivered to one watch; other watches still get it."""
+    return f"{watch_id}|{aid}"
+
+
+class Watchlist:
+    """
+    Background poller for registered Google News queries.
+    `fetch(query, hl, gl, ceid)` returns the same payload as _fetch_rss.
+    """
+
+    def __init__(self, fetch, path: str = WATCHLIST_PATH):
+        self.fetch = fetch
+        self.path = path
+        self.seen = BloomFilter()
+        self.watches = {}
+        self._task = None
+        self._wake = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.watches = json.load(f)
+        except (OSError, ValueError):
+            self.watches = {}
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.watches, f)
+        os.replace(tmp, self.path)
+
+    def ensure_running(self):
+        """Start the scheduler on the current event loop if it is not running."""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def add(self, query: str, hl: str, gl: str, ceid: str) -> dict:
+        watch_id = secrets.token_hex(4)
+        self.watches[watch_id] = {
+            "id": watch_id, "query": query, "hl": hl, "gl": gl, "ceid": ceid,
+            "interval": MIN_INTERVAL, "next_poll": 0.0, "last_polled": None,
+            "baseline": True, "pending": [], "errors": 0,
+        }
+        self._save()
+        if self._wake:
+            self._wake.set()
+        return self.describe(watch_id)
+
+    def remove(self, watch_id: str) -> bool:
+        if self.watches.pop(watch_id, None) is None:
+            return False
+        self._save()
+        return True
+
+    def describe(self, watch_id: str) -> dict:
+        w = self.watches[watch_id]
+        return {"id": w["id"], "query": w["query"], "interval": w["interval"],
+                "last_polled": w["last_polled"], "pending": len(w["pending"])}
+
+    async def poll(self, watch_id: str):
+        """Fetch one watch and buffer articles that were never delivered."""
+        w = self.watches.get(watch_id)
+        if w is None:
+            return
+        try:
+            payload = await self.fetch(w["query"], w["hl"], w["gl"], w["ceid"])
+        except Exception as e:
+            payload = {"error": str(e)}
+        if watch_id not in self.watches:
+            return
+        now = time.time()
+        w["last_polled"] = now
+        if payload.get("error"):
+            w["errors"] += 1
+            w["interval"] = min(MAX_INTERVAL, w["interval"] * 2)
+        else:
+            w["errors"] = 0
+            pending_ids = {article_id(a) for a in w["pending"]}
+            fresh = []
+            for a in payload.get("articles", []):
+                aid = article_id(a)
+                if seen_key(watch_id, aid) not in self.seen and aid not in pending_ids:
+                    fresh.append(a)
+                    pending_ids.add(aid)
+            if w.pop("baseline", False):
+                # Articles already in the feed when the watch was created count as delivered
+                for a in fresh:
+                    self.seen.add(seen_key(watch_id, article_id(a)))
+                self.seen.save()
+                fresh = []
+            w["pending"] = (w["pending"] + fresh)[-MAX_PENDING:]
+            # Busy topics are polled more often, quiet ones back off
+            if fresh:
+                w["interval"] = max(MIN_INTERVAL, w["interval"] / 2)
+            else:
+                w["interval"] = min(MAX_INTERVAL, w["interval"] * 1.5)
+        w["next_poll"] = now + w["interval"]
+        self._save()
+
+    def take(self, watch_id: str, limit: int) -> list:
+        """Remove and return up to `limit` buffered articles, marking them delivered."""
+        w = self.watches[watch_id]
+        out, w["pending"] = w["pending"][:limit], w["pending"][limit:]
+        for a in out:
+            self.seen.add(seen_key(watch_id, article_id(a)))
+        if out:
+            self.seen.save()
+            self._save()
+        return out
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            due = [wid for wid, w in self.watches.items() if w["next_poll"] <= now]
+            if due:
+                await asyncio.gather(*(self.poll(wid) for wid in due), return_exceptions=True)
+            upcoming = [w["next_poll"] for w in self.watches.values()]
+            delay = min(upcoming) - time.time() if upcoming else MAX_INTERVAL
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(1.0, delay))
+            except asyncio.TimeoutError:
+                pass
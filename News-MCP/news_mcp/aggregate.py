@@ -0,0 +1,196 @@
+import re
+import base64
+import hashlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the click and never change the article.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ocid", "cmpid",
+    "ref", "ref_src", "smid", "taid", "oc", "ito", "cid", "sr_share",
+}
+
+# Two articles whose title (or description) word sets have at least this Jaccard
+# similarity are treated as the same story. Reworded copies of a headline keep most of
+# its content words (0.64-0.9 on wire variants); just above 3/5 because short headlines
+# sharing three of five words are often different stories ("Boeing/Airbus CEO to step down").
+MIN_SIMILARITY = 0.62
+# MinHash LSH: a pair at MIN_SIMILARITY shares one of 8 two-row bands with ~98%
+# probability; only articles sharing a band are compared, exactly.
+_BANDS = 8
+_ROWS = 2
+
+# Descriptions shorter than this are too generic to fingerprint on their own.
+MIN_DESCRIPTION_TOKENS = 8
+
+_STOP_WORDS = set(
+    "a an the of to in on for and or by with as at from is are was were be been "
+    "it its this that these those his her their after over into new says".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+_TAG = re.compile(r"<[^>]+>")
+_EMBEDDED_URL = re.compile(rb"https?://[\x21-\x7e]+")
+
+
+def _unwrap_google_news(url: str) -> str:
+    """
+    news.google.com/rss/articles/<id> ids in the older format are base64 protobufs
+    that embed the publisher URL; decode them locally. Newer opaque ids are kept as-is.
+    """
+    parts = urlsplit(url)
+    if parts.netloc != "news.google.com" or "/articles/" not in parts.path:
+        return url
+    token = parts.path.rsplit("/", 1)[-1]
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        return url
+    match = _EMBEDDED_URL.search(raw)
+    return match.group(0).decode("ascii") if match else url
+
+
+def canonical_url(url: str | None) -> str | None:
+    """Resolve redirect wrappers and drop tracking params and fragments."""
+    if not url:
+        return url
+    url = _unwrap_google_news(url)
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    # google.com/url?q=<target> and similar redirectors
+    if parts.path == "/url":
+        for name, value in query:
+            if name in ("q", "url") and value.startswith("http"):
+                return canonical_url(value)
+    kept = sorted((k, v) for k, v in query if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_"))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(kept), ""))
+
+
+def _url_key(url: str) -> str:
+    # http/https, www. and a trailing slash do not make a different article
+    rest = url.split("://", 1)[-1]
+    if rest.startswith("www."):
+        rest = rest[4:]
+    host, _, tail = rest.partition("/")
+    path, _, query = tail.partition("?")
+    return host + "/" + path.rstrip("/") + ("?" + query if query else "")
+
+
+def _stem(word: str) -> str:
+    # Crude suffix stripping so "recalls"/"recalling"/"recalled" count as one word
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith("ed"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _tokens(text: str):
+    return [_stem(w) for w in _WORD.findall(_TAG.sub(" ", text).lower()) if w not in _STOP_WORDS]
+
+
+def _title_tokens(article: dict):
+    title = article.get("title") or ""
+    source = article.get("source") or ""
+    # Google News titles end in " - Outlet"; the outlet name is not part of the story
+    if source and title.endswith(" - " + source):
+        title = title[: -len(source) - 3]
+    return _tokens(title)
+
+
+def minhash(tokens) -> tuple:
+    """MinHash signature (_BANDS * _ROWS 32-bit minima) of a set of words."""
+    signature = [0xFFFFFFFF] * (_BANDS * _ROWS)
+    for token in tokens:
+        digest = hashlib.blake2b(token.encode(), digest_size=4 * _BANDS * _ROWS).digest()
+        signature = [min(m, int.from_bytes(digest[4 * i:4 * i + 4], "big")) for i, m in enumerate(signature)]
+    return tuple(signature)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class SimilarityIndex:
+    """MinHash LSH lookup of word sets: only sets sharing a band are compared by Jaccard."""
+
+    def __init__(self, min_similarity: float = MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self._bands = [{} for _ in range(_BANDS)]
+
+    def _keys(self, tokens: frozenset):
+        signature = minhash(tokens)
+        return [signature[i * _ROWS:(i + 1) * _ROWS] for i in range(_BANDS)]
+
+    def find(self, tokens: frozenset):
+        for band, key in zip(self._bands, self._keys(tokens)):
+            for other, item in band.get(key, ()):
+                if jaccard(tokens, other) >= self.min_similarity:
+                    return item
+        return None
+
+    def add(self, tokens: frozenset, item):
+        for band, key in zip(self._bands, self._keys(tokens)):
+            band.setdefault(key, []).append((tokens, item))
+
+
+def published_ts(value: str | None) -> float:
+    """Sort key for ISO 8601 (NewsAPI) and RFC 822 (RSS) timestamps."""
+    if not value:
+        return 0.0
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def collapse(articles, min_similarity: float = MIN_SIMILARITY):
+    """
+    Newest-first list with exact (canonical URL) and near-duplicate (similar title or
+    description words) copies folded into the first occurrence, which records how many
+    copies were dropped and the other outlets that ran the story.
+    """
+    by_url = {}
+    titles = SimilarityIndex(min_similarity)
+    descriptions = SimilarityIndex(min_similarity)
+    out = []
+    for a in sorted(articles, key=lambda a: published_ts(a.get("publishedAt")), reverse=True):
+        a = dict(a, url=canonical_url(a.get("url")))
+        url_key = _url_key(a["url"]) if a["url"] else None
+        keeper = by_url.get(url_key) if url_key else None
+        title = frozenset(_title_tokens(a))
+        desc = None
+        # An empty or stop-word-only title says nothing about the story: match such
+        # articles by URL only, or they would all match each other
+        if keeper is None and title:
+            keeper = titles.find(title)
+        if keeper is None and title:
+            words = _tokens(a.get("description") or "")
+            if len(words) >= MIN_DESCRIPTION_TOKENS:
+                desc = frozenset(words)
+                keeper = descriptions.find(desc)
+        if keeper is not None:
+            if url_key:
+                by_url.setdefault(url_key, keeper)
+            keeper["duplicates"] += 1
+            if a.get("source") and a["source"] not in keeper["also_in"] and a["source"] != keeper.get("source"):
+                keeper["also_in"].append(a["source"])
+            continue
+        a["duplicates"] = 0
+        a["also_in"] = []
+        if url_key:
+            by_url[url_key] = a
+        if title:
+            titles.add(title, a)
+        if desc is not None:
+            descriptions.add(desc, a)
+        out.append(a)
+    return out
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+from datetime import datetime, timezone
+
+# Persistent NewsAPI response cache with a daily request budget.
+# The developer tier allows 100 requests/day; once usage reaches
+# DAILY_QUOTA - QUOTA_RESERVE, expired entries are served instead of spending quota.
+CACHE_PATH = os.getenv("NEWS_CACHE_PATH", "news_cache.db")
+DAILY_QUOTA = int(os.getenv("NEWS_API_DAILY_QUOTA", "100"))
+QUOTA_RESERVE = int(os.getenv("NEWS_API_QUOTA_RESERVE", "10"))
+
+# Seconds a response stays fresh, per endpoint.
+ENDPOINT_TTL = {
+    "top-headlines": 15 * 60,
+    "everything": 30 * 60,
+}
+DEFAULT_TTL = 15 * 60
+
+# Parameters NewsAPI treats case-insensitively; normalized so equivalent calls share a key.
+_FOLDED_PARAMS = {"q", "country", "category", "language", "sortBy"}
+
+
+def cache_key(path: str, params: dict) -> str:
+    norm = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        value = str(value)
+        if name in _FOLDED_PARAMS:
+            value = " ".join(value.casefold().split())
+        norm[name] = value
+    return path.strip("/") + "?" + json.dumps(norm, sort_keys=True)
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class NewsCache:
+    def __init__(self, path: str = CACHE_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quota (day TEXT PRIMARY KEY, used INTEGER NOT NULL)"
+        )
+        self._db.commit()
+        self._inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "stale_served": 0, "coalesced": 0}
+
+    def quota_used(self) -> int:
+        row = self._db.execute("SELECT used FROM quota WHERE day = ?", (_today(),)).fetchone()
+        return row[0] if row else 0
+
+    def _count_call(self):
+        self._db.execute(
+            "INSERT INTO quota (day, used) VALUES (?, 1)"
+            " ON CONFLICT(day) DO UPDATE SET used = used + 1",
+            (_today(),),
+        )
+        self._db.commit()
+
+    def _lookup(self, key: str):
+        row = self._db.execute(
+            "SELECT body, fetched_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def _store(self, key: str, data: dict):
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, body, fetched_at) VALUES (?, ?, ?)",
+            (key, json.dumps(data), time.time()),
+        )
+        self._db.commit()
+
+    async def get(self, path: str, params: dict, fetch):
+        """
+        Return the NewsAPI response for (path, params), calling `fetch()` only when
+        the cached copy is missing or expired and the daily budget allows it.
+        Error responses ({"error": ...}) are returned but never cached.
+        """
+        key = cache_key(path, params)
+        data, age = self._lookup(key)
+        if data is not None and age < ENDPOINT_TTL.get(path, DEFAULT_TTL):
+            self.stats["hits"] += 1
+            return data
+
+        used = self.quota_used()
+        if data is not None and used >= DAILY_QUOTA - QUOTA_RESERVE:
+            self.stats["stale_served"] += 1
+            return data
+        if used >= DAILY_QUOTA:
+            return {"error": "NewsAPI daily quota exhausted",
+                    "details": f"{used}/{DAILY_QUOTA} requests used today; no cached copy available"}
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+        self.stats["misses"] += 1
+        task = asyncio.ensure_future(self._fetch(key, fetch))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, fetch):
+        self._count_call()
+        data = await fetch()
+        if "error" not in data:
+            self._store(key, data)
+        return data
+
+    def summary(self) -> dict:
+        used = self.quota_used()
+        entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "quota": {"day": _today(), "used": used, "limit": DAILY_QUOTA,
+                      "remaining": max(0, DAILY_QUOTA - used),
+                      "serving_stale": used >= DAILY_QUOTA - QUOTA_RESERVE},
+            "cache": {"entries": entries, **self.stats},
+        }
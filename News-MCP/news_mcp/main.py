@@ -1,21 +1,46 @@
 import os
 import json
+import time
+import asyncio
+import secrets
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv, find_dotenv
 from aiohttp import ClientSession, ClientResponseError
 from mcp.server.fastmcp import FastMCP
+from mcp_common.http import get_session, http_lifespan
+from mcp_common.transport import run
 
 load_dotenv(find_dotenv())  # finds News-MCP/.env
+from news_mcp.cache import NewsCache  # reads its settings from the environment
+from news_mcp.aggregate import collapse
+
+# Google News RSS source from the News-MCP-User server; aggregation degrades to NewsAPI only without it
+try:
+    from news_user.main import get_latest_news_about
+except ImportError:
+    get_latest_news_about = None
 
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
-NEWS_API_BASE = "https://newsapi.org/v2"
+NEWS_API_BASE = os.getenv("NEWS_API_BASE", "https://newsapi.org/v2")
+
+mcp = FastMCP("News-MCP", lifespan=http_lifespan)
+news_cache = NewsCache()
 
-mcp = FastMCP("News-MCP")
+# NewsAPI pages hold at most 100 articles. The developer tier also caps a query at
+# 100 results in total; paid plans can raise NEWS_API_MAX_RESULTS.
+PAGE_SIZE = 100
+MAX_RESULTS = int(os.getenv("NEWS_API_MAX_RESULTS", "100"))
+CURSOR_TTL = 10 * 60
+_cursors = {}
+
+# 'from' is floored to this many seconds so repeated queries map to the same cache key.
+FROM_GRANULARITY = 15 * 60
 
 def _iso_from_hours(hours: int) -> str:
     # NewsAPI expects ISO8601 with timezone; use UTC
     dt = datetime.now(timezone.utc) - timedelta(hours=max(1, int(hours)))
-    return dt.isoformat(timespec="seconds")
+    floored = int(dt.timestamp()) // FROM_GRANULARITY * FROM_GRANULARITY
+    return datetime.fromtimestamp(floored, timezone.utc).isoformat(timespec="seconds")
 
 def _normalize_articles(articles):
     # Keep it small + MCP-friendly
@@ -34,42 +59,110 @@ async def _newsapi_get(session: ClientSession, path: str, params: dict):
     if not NEWS_API_KEY:
         return {"error": "Missing NEWS_API_KEY env var"}
     headers = {"X-Api-Key": NEWS_API_KEY}
-    async with session.get(f"{NEWS_API_BASE}/{path}", headers=headers, params=params) as resp:
-        try:
-            resp.raise_for_status()
-        except ClientResponseError:
-            text = await resp.text()
-            return {"error": f"HTTP {resp.status}", "details": text}
-        return await resp.json()
+
+    async def fetch():
+        async with session.get(f"{NEWS_API_BASE}/{path}", headers=headers, params=params) as resp:
+            try:
+                resp.raise_for_status()
+            except ClientResponseError:
+                text = await resp.text()
+                return {"error": f"HTTP {resp.status}", "details": text}
+            return await resp.json()
+
+    return await news_cache.get(path, params, fetch)
+
+def _merge_pages(pages):
+    # Pages can overlap when new articles arrive between requests; keep newest first
+    seen = set()
+    out = []
+    for a in sorted((a for page in pages for a in page), key=lambda a: a.get("publishedAt") or "", reverse=True):
+        key = a.get("url") or a.get("title")
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(a)
+    return out
+
+def _stash(articles) -> str | None:
+    # Park results beyond the first chunk behind a cursor for get_more_news
+    if not articles:
+        return None
+    now = time.monotonic()
+    for cid in [c for c, (expires, _) in _cursors.items() if expires < now]:
+        del _cursors[cid]
+    cid = secrets.token_urlsafe(8)
+    _cursors[cid] = (now + CURSOR_TTL, articles)
+    return cid
 
 @mcp.tool()
 async def get_latest_news(query: str, hours: int = 24, max_results: int = 10, language: str = "en"):
     """
     Get recent articles about a topic from the last N hours (default 24).
     Returns a compact list with title, source, url, publishedAt, description.
+    max_results above 100 fetches the further pages that exist concurrently (up to NEWS_API_MAX_RESULTS);
+    the first 100 articles are returned and the rest are available via get_more_news(next_cursor).
     """
     try:
         if not query or not query.strip():
             return {"error": "Provide a non-empty 'query'."}
 
-        params = {
+        wanted = max(1, min(int(max_results), MAX_RESULTS))
+        page_size = min(wanted, PAGE_SIZE)
+        base = {
             "q": query.strip(),
             "from": _iso_from_hours(hours),
             "sortBy": "publishedAt",
             "language": language,
-            "pageSize": max(1, min(int(max_results), 100)),
+            "pageSize": page_size,
         }
-        async with ClientSession() as session:
-            data = await _newsapi_get(session, "everything", params)
-            if "error" in data:
-                return data
-            return {
-                "total": data.get("totalResults"),
-                "articles": _normalize_articles(data.get("articles")),
-            }
+        session = get_session()
+        # Page 1 first: its totalResults says how many more pages exist, so no quota
+        # is spent on pages past the end. The remaining pages are fetched concurrently.
+        data = await _newsapi_get(session, "everything", base)
+        if "error" in data:
+            return data
+        available = -(-int(data.get("totalResults") or 0) // page_size)
+        page_count = max(1, min(-(-wanted // page_size), available))
+        results = [data] + list(await asyncio.gather(*(
+            _newsapi_get(session, "everything", dict(base, page=n)) for n in range(2, page_count + 1)
+        )))
+
+        pages = []
+        for page in results:
+            # A later page failing (e.g. plan result limit) still leaves the earlier ones usable
+            if "error" in page:
+                break
+            pages.append(_normalize_articles(page.get("articles")))
+        articles = _merge_pages(pages)[:wanted]
+        out = {
+            "total": data.get("totalResults"),
+            "articles": articles[:PAGE_SIZE],
+        }
+        cursor = _stash(articles[PAGE_SIZE:])
+        if cursor:
+            out["next_cursor"] = cursor
+        if len(pages) < len(results):
+            out["partial"] = True
+        return out
     except Exception as e:
         return {"error": f"get_latest_news failed: {e}"}
 
+@mcp.tool()
+async def get_more_news(cursor: str):
+    """
+    Continue a large get_latest_news result: returns the next chunk of articles
+    and a new next_cursor while more remain. Cursors expire after 10 minutes.
+    """
+    entry = _cursors.pop(cursor, None)
+    if entry is None or entry[0] < time.monotonic():
+        return {"error": "Unknown or expired cursor."}
+    articles = entry[1]
+    out = {"articles": articles[:PAGE_SIZE]}
+    next_cursor = _stash(articles[PAGE_SIZE:])
+    if next_cursor:
+        out["next_cursor"] = next_cursor
+    return out
+
 @mcp.tool()
 async def get_headlines(country: str = "us", category: str | None = None, max_results: int = 10):
     """
@@ -82,16 +175,61 @@ async def get_headlines(country: str = "us", category: str | None = None, max_re
         }
         if category:
             params["category"] = category
-        async with ClientSession() as session:
-            data = await _newsapi_get(session, "top-headlines", params)
-            if "error" in data:
-                return data
-            return {
-                "total": data.get("totalResults"),
-                "articles": _normalize_articles(data.get("articles")),
-            }
+        data = await _newsapi_get(get_session(), "top-headlines", params)
+        if "error" in data:
+            return data
+        return {
+            "total": data.get("totalResults"),
+            "articles": _normalize_articles(data.get("articles")),
+        }
     except Exception as e:
         return {"error": f"get_headlines failed: {e}"}
 
+@mcp.tool()
+async def get_news_aggregated(query: str, hours: int = 24, max_results: int = 20, language: str = "en"):
+    """
+    Search NewsAPI and Google News RSS at the same time and merge the results.
+    URLs are canonicalized (tracking params removed, Google News links unwrapped) and
+    near-duplicate stories are collapsed into one entry with 'duplicates' and 'also_in'.
+    """
+    if not query or not query.strip():
+        return {"error": "Provide a non-empty 'query'."}
+    n = max(1, min(int(max_results), MAX_RESULTS))
+
+    fetches = {"newsapi": get_latest_news(query, hours, n, language)}
+    if get_latest_news_about is not None:
+        # Google News search understands when:<N>h for recency
+        fetches["google-news-rss"] = get_latest_news_about(f"{query.strip()} when:{max(1, int(hours))}h",
+                                                          max_results=min(n, 50))
+    results = await asyncio.gather(*fetches.values(), return_exceptions=True)
+
+    sources = {}
+    articles = []
+    for name, res in zip(fetches, results):
+        if isinstance(res, Exception):
+            sources[name] = {"error": str(res)}
+        elif "error" in res:
+            sources[name] = {"error": res["error"]}
+        else:
+            sources[name] = {"count": len(res.get("articles", []))}
+            articles.extend(dict(a, via=name) for a in res.get("articles", []))
+    if get_latest_news_about is None:
+        sources["google-news-rss"] = {"error": "news_user package not installed"}
+
+    merged = collapse(articles)
+    return {
+        "total": len(merged),
+        "collapsed": len(articles) - len(merged),
+        "sources": sources,
+        "articles": merged[:n],
+    }
+
+@mcp.tool()
+async def news_api_stats():
+    """
+    Show today's NewsAPI quota usage and response-cache statistics.
+    """
+    return news_cache.summary()
+
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    run(mcp, port=8103)
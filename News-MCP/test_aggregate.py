@@ -0,0 +1,59 @@
+import pytest
+
+from news_mcp.aggregate import collapse
+
+# Reworded copies of one story as different outlets ran them
+VARIANTS = [
+    ("Fed holds interest rates steady, signals two cuts this year",
+     "Fed holds rates steady and signals two cuts this year"),
+    ("Stocks rally as inflation cools", "Stocks rally as inflation cools in May"),
+    ("Tesla recalls over 2 million vehicles to fix Autopilot",
+     "Tesla recalls 2 million vehicles to fix Autopilot safety flaw"),
+    ("Apple unveils iPhone 17 with thinner design", "Apple unveils thinner iPhone 17"),
+    ("Boeing CEO Dave Calhoun to step down at end of year",
+     "Boeing CEO Calhoun to step down by year-end amid safety crisis"),
+]
+
+# Different stories on the same topic
+DISTINCT = [
+    ("Fed holds rates steady", "Fed cuts rates by half a point"),
+    ("Stocks rally as inflation cools", "Stocks fall as inflation heats up"),
+    ("Apple shares fall after iPhone launch", "Apple unveils iPhone 17"),
+    ("Tesla recalls 2 million vehicles over Autopilot", "Tesla shares jump after Autopilot upgrade"),
+    ("Boeing CEO to step down", "Airbus CEO to step down"),
+]
+
+
+def article(title, source, url, published="2025-06-01T12:00:00Z", description=None):
+    return {"title": title, "source": source, "url": url, "publishedAt": published, "description": description}
+
+
+def pair(first, second):
+    return [article(first, "Reuters", "https://reuters.com/a", "2025-06-01T12:00:00Z"),
+            article(second, "AP", "https://apnews.com/b", "2025-06-01T11:00:00Z")]
+
+
+@pytest.mark.parametrize("first, second", VARIANTS)
+def test_reworded_headlines_collapse(first, second):
+    merged = collapse(pair(first, second))
+    assert len(merged) == 1
+    assert merged[0]["title"] == first and merged[0]["duplicates"] == 1 and merged[0]["also_in"] == ["AP"]
+
+
+@pytest.mark.parametrize("first, second", DISTINCT)
+def test_different_stories_are_kept(first, second):
+    assert len(collapse(pair(first, second))) == 2
+
+
+def test_same_url_collapses_and_outlet_suffix_is_ignored():
+    merged = collapse([
+        article("Apple unveils thinner iPhone 17 - The Verge", "The Verge", "https://www.theverge.com/x?utm_source=rss"),
+        article("Totally different wording", "The Verge", "http://theverge.com/x/"),
+        article("Apple unveils thinner iPhone 17", "CNBC", "https://cnbc.com/y"),
+    ])
+    assert len(merged) == 1 and merged[0]["duplicates"] == 2 and merged[0]["also_in"] == ["CNBC"]
+
+
+def test_titles_without_content_words_match_by_url_only():
+    merged = collapse([article("The", "A", "https://a.com/1"), article("", "B", "https://b.com/2")])
+    assert len(merged) == 2
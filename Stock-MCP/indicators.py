@@ -0,0 +1,160 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Technical indicators over daily bars. Every function takes 1-D (time) or 2-D
+# (symbols x time) float arrays and returns the same shape, NaN during warm-up.
+# Rows may start with a NaN prefix (shorter histories left-padded by `stack`);
+# each row is seeded from its own first valid window, so many symbols are
+# computed together with one pass over time.
+#
+# Definitions follow AlphaVantage (TA-Lib): EMA and Wilder smoothing are seeded
+# with the simple average of the first `n` values.
+
+
+def stack(rows) -> np.ndarray:
+    """Left-pad 1-D series of different lengths with NaN into one (symbols x time) matrix."""
+    width = max((len(r) for r in rows), default=0)
+    out = np.full((len(rows), width), np.nan)
+    for i, r in enumerate(rows):
+        if len(r):
+            out[i, width - len(r):] = r
+    return out
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+
+def _smooth(x, n: int, alpha: float) -> np.ndarray:
+    """y = mean(first n valid x), then y[t] = y[t-1] + alpha * (x[t] - y[t-1])."""
+    x = np.asarray(x, dtype=np.float64)
+    x2 = np.atleast_2d(x)
+    rows, width = x2.shape
+    y = np.full_like(x2, np.nan)
+    first = _first_valid(x2)
+    seed_at = first + n - 1
+    ok = seed_at < width
+    if not ok.any():
+        return y.reshape(x.shape)
+    r = np.flatnonzero(ok)
+    csum = np.concatenate([np.zeros((rows, 1)), np.cumsum(np.nan_to_num(x2), axis=1)], axis=1)
+    seeds = (csum[r, seed_at[r] + 1] - csum[r, first[r]]) / n
+    prev = np.full(rows, np.nan)
+    for t in range(int(seed_at[r].min()), width):
+        prev = prev + alpha * (x2[:, t] - prev)
+        starting = seed_at[r] == t
+        if starting.any():
+            prev[r[starting]] = seeds[starting]
+        y[:, t] = prev
+    return y.reshape(x.shape)
+
+
+def sma(x, n: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full_like(x, np.nan)
+    if x.shape[-1] >= n:
+        out[..., n - 1:] = sliding_window_view(x, n, axis=-1).mean(axis=-1)
+    return out
+
+
+def ema(x, n: int) -> np.ndarray:
+    return _smooth(x, n, 2.0 / (n + 1))
+
+
+def rsi(close, n: int = 14) -> np.ndarray:
+    """Wilder's RSI; the first value is at index n."""
+    close = np.asarray(close, dtype=np.float64)
+    change = np.diff(close, axis=-1, prepend=np.nan)
+    gain = np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0))
+    loss = np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0))
+    avg_gain = _smooth(gain, n, 1.0 / n)
+    avg_loss = _smooth(loss, n, 1.0 / n)
+    total = avg_gain + avg_loss
+    # 100 * G / (G + L) == 100 - 100 / (1 + G / L), without dividing by a zero loss;
+    # a completely flat window is 0, as in TA-Lib
+    with np.errstate(invalid="ignore"):
+        return np.where(total == 0, 0.0, 100.0 * avg_gain / np.where(total == 0, 1.0, total))
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> dict:
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)
+    return {"macd": line, "signal": sig, "hist": line - sig}
+
+
+def bbands(close, n: int = 20, k: float = 2.0) -> dict:
+    close = np.asarray(close, dtype=np.float64)
+    middle = sma(close, n)
+    std = np.full_like(close, np.nan)
+    if close.shape[-1] >= n:
+        std[..., n - 1:] = sliding_window_view(close, n, axis=-1).std(axis=-1)
+    return {"upper": middle + k * std, "middle": middle, "lower": middle - k * std}
+
+
+def atr(high, low, close, n: int = 14) -> np.ndarray:
+    """Wilder's average true range; the first value (mean of TR[1..n]) is at index n."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    prev = np.roll(close, 1, axis=-1)
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+    tr[..., 0] = np.nan
+    return _smooth(tr, n, 1.0 / n)
+
+
+# name -> (function, inputs, parameter defaults)
+INDICATORS = {
+    "sma": (sma, ("series",), {"period": 20}),
+    "ema": (ema, ("series",), {"period": 20}),
+    "rsi": (rsi, ("series",), {"period": 14}),
+    "macd": (macd, ("series",), {"fast": 12, "slow": 26, "signal": 9}),
+    "bbands": (bbands, ("series",), {"period": 20, "k": 2.0}),
+    "atr": (atr, ("high", "low", "close"), {"period": 14}),
+}
+
+
+def label(spec: dict) -> str:
+    """Stable result key for a spec, e.g. 'rsi_14', 'macd_12_26_9', 'bbands_20_2'."""
+    name = spec["name"].lower()
+    params = {**INDICATORS[name][2], **{k: v for k, v in spec.items() if k in INDICATORS[name][2]}}
+    parts = [name] + [f"{v:g}" if isinstance(v, float) else str(v) for v in params.values()]
+    if spec.get("series_type", "close") != "close" and INDICATORS[name][1] == ("series",):
+        parts.append(spec["series_type"])
+    return "_".join(parts)
+
+
+def lookback(spec: dict) -> int:
+    """Bars a spec consumes before its first value; 0 for specs `evaluate` would reject."""
+    name = str(spec.get("name", "")).lower()
+    if name not in INDICATORS:
+        return 0
+    try:
+        params = {k: int(spec.get(k, v)) for k, v in INDICATORS[name][2].items() if isinstance(v, int)}
+    except (TypeError, ValueError):
+        return 0
+    if name == "macd":
+        return params["slow"] + params["signal"]
+    return max(params.values())
+
+
+def evaluate(spec: dict, bars: dict):
+    """
+    Compute one indicator spec, e.g. {"name": "rsi", "period": 14, "series_type": "close"},
+    over `bars` ({"open", "high", "low", "close"} -> arrays). Unknown names and
+    periods below 1 raise ValueError.
+    """
+    name = spec.get("name", "").lower()
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator '{spec.get('name')}'; expected one of {sorted(INDICATORS)}")
+    fn, inputs, defaults = INDICATORS[name]
+    params = {k: type(v)(spec.get(k, v)) for k, v in defaults.items()}
+    for k, v in params.items():
+        if isinstance(v, int) and v < 1:
+            raise ValueError(f"'{k}' of {name} must be at least 1, got {v}")
+    series_type = spec.get("series_type", "close")
+    if series_type not in bars:
+        raise ValueError(f"Unknown series_type '{series_type}'")
+    args = [bars[series_type] if i == "series" else bars[i] for i in inputs]
+    if "period" in params:
+        params["n"] = params.pop("period")
+    return fn(*args, **params)
+
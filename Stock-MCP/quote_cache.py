@@ -0,0 +1,97 @@
+import time
+import asyncio
+
+# Quotes older than STOCK_QUOTE_TTL are refetched; until the refetch lands the
+# previous value can still be served (flagged stale) for up to MAX_STALE seconds.
+MAX_STALE = 24 * 3600
+
+
+class QuoteCache:
+    """
+    Per-symbol TTL cache for GLOBAL_QUOTE responses.
+
+    - Concurrent requests for the same symbol share one upstream fetch.
+    - Fetches keep running after a caller stops waiting, so a symbol that was
+      still queued behind the rate limiter is cached for the next call.
+    Failed fetches are never cached.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}
+        self._inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "stale_served": 0}
+
+    def lookup(self, symbol: str):
+        """(data, fetched_at epoch seconds) or None."""
+        entry = self._entries.get(symbol)
+        if entry is None or time.time() - entry[1] > self.ttl + MAX_STALE:
+            return None
+        return entry
+
+    def _start(self, symbol: str, fetch) -> asyncio.Task:
+        task = self._inflight.get(symbol)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        self.stats["misses"] += 1
+        task = asyncio.ensure_future(self._fetch(symbol, fetch))
+        self._inflight[symbol] = task
+        task.add_done_callback(lambda t: self._done(symbol, t))
+        return task
+
+    def _done(self, symbol: str, task):
+        self._inflight.pop(symbol, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, symbol: str, fetch):
+        data = await fetch(symbol)
+        entry = (data, time.time())
+        self._entries[symbol] = entry
+        return entry
+
+    async def get(self, symbol: str, fetch, max_age: float | None = None):
+        """(data, fetched_at) for one symbol, fetching only when the cached copy is too old."""
+        entry = self.lookup(symbol)
+        if entry is not None and time.time() - entry[1] < (self.ttl if max_age is None else max_age):
+            self.stats["hits"] += 1
+            return entry
+        return await asyncio.shield(self._start(symbol, fetch))
+
+    async def get_many(self, symbols, fetch, max_age: float | None = None, timeout: float | None = None):
+        """
+        Quotes for many symbols. Fresh entries are answered from memory; misses are
+        started in the given order (so a FIFO rate limiter serves them in that order)
+        and awaited for at most `timeout` seconds.
+        Returns (found {symbol: (data, fetched_at, stale)}, pending [symbol], errors {symbol: message}).
+        """
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        found, tasks = {}, {}
+        for symbol in symbols:
+            entry = self.lookup(symbol)
+            if entry is not None and now - entry[1] < max_age:
+                self.stats["hits"] += 1
+                found[symbol] = (entry[0], entry[1], False)
+            else:
+                tasks[symbol] = self._start(symbol, fetch)
+        if tasks:
+            await asyncio.wait(set(tasks.values()), timeout=timeout)
+
+        pending, errors = [], {}
+        for symbol, task in tasks.items():
+            if task.done():
+                if task.exception() is not None:
+                    errors[symbol] = str(task.exception())
+                else:
+                    data, fetched_at = task.result()
+                    found[symbol] = (data, fetched_at, False)
+                continue
+            entry = self.lookup(symbol)
+            if entry is not None:
+                # Still queued behind the rate limiter: answer with the last known quote
+                self.stats["stale_served"] += 1
+                found[symbol] = (entry[0], entry[1], True)
+            pending.append(symbol)
+        return found, pending, errors
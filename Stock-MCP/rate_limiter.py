@@ -0,0 +1,38 @@
+import time
+import asyncio
+
+
+class TokenBucket:
+    """
+    Async token bucket. Callers queue in arrival order (the lock is FIFO) and wait
+    for a token instead of failing, so bursts are spread over the plan's rate.
+    """
+
+    def __init__(self, per_minute: float, burst: int | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, int(per_minute)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def drain(self):
+        """The upstream reported a rate limit: spend the bucket so callers wait a full refill."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    def waiting(self) -> bool:
+        return self._lock.locked()
@@ -0,0 +1,184 @@
+import ast
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import indicators as ta
+
+# Bars per symbol kept in the screening matrix: enough warm-up for a 200-day
+# average and for EMA/Wilder smoothing to settle, without loading decades of history.
+HISTORY = 600
+
+PRICES = ("open", "high", "low", "close", "volume")
+# Computed sub-expressions kept per Screen before the memo is reset.
+MAX_MEMO = 256
+
+
+def align(series: dict, history: int = HISTORY):
+    """
+    {symbol: (dates, bars)} -> (symbols, dates, {field: (symbols x dates) matrix}).
+    Dates are the union of every symbol's last `history` bars. A symbol missing a
+    date inside its own range carries its previous bar forward; outside its range it is NaN.
+    """
+    symbols = list(series)
+    if not symbols:
+        return symbols, np.empty(0, dtype=np.int64), {f: np.empty((0, 0)) for f in PRICES}
+    dates = np.unique(np.concatenate([d[-history:] for d, _ in series.values()]))[-history:]
+    cols = np.arange(len(dates))
+    matrix = {f: np.full((len(symbols), len(dates)), np.nan) for f in PRICES}
+    first = np.zeros(len(symbols), dtype=np.int64)
+    last = np.zeros(len(symbols), dtype=np.int64)
+    for row, (d, bars) in enumerate(series.values()):
+        keep = d >= dates[0]
+        pos = np.searchsorted(dates, d[keep])
+        for f in PRICES:
+            matrix[f][row, pos] = np.asarray(bars[f])[keep]
+        first[row], last[row] = (pos[0], pos[-1]) if len(pos) else (len(dates), -1)
+    inside = (cols >= first[:, None]) & (cols <= last[:, None])
+    for f in PRICES:
+        m = matrix[f]
+        source = np.where(~np.isnan(m), cols, 0)
+        np.maximum.accumulate(source, axis=1, out=source)
+        filled = np.take_along_axis(m, source, axis=1)
+        matrix[f] = np.where(inside, filled, np.nan)
+    return symbols, dates, matrix
+
+
+def _period(n) -> int:
+    n = int(n)
+    if n < 1:
+        raise ValueError(f"Periods must be at least 1, got {n}")
+    return n
+
+
+def _rolling(x, n: int, fn):
+    out = np.full_like(x, np.nan)
+    if x.shape[-1] >= n:
+        out[..., n - 1:] = fn(sliding_window_view(x, n, axis=-1), axis=-1)
+    return out
+
+
+def _pct_change(x, n: int):
+    out = np.full_like(x, np.nan)
+    if x.shape[-1] > n:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[..., n:] = (x[..., n:] / x[..., :-n] - 1) * 100
+    return out
+
+
+def _cross(a, b, days: int, above: bool):
+    diff = a - b if above else b - a
+    crossed = np.zeros(diff.shape, dtype=bool)
+    crossed[:, 1:] = (diff[:, :-1] <= 0) & (diff[:, 1:] > 0)
+    # Crossed at any of the last `days` bars
+    return _rolling(crossed.astype(np.float64), int(days), np.max) > 0
+
+
+class Screen:
+    """
+    Evaluates screening expressions over aligned (symbols x dates) price matrices.
+
+    Expressions are Python syntax restricted to numbers, the price names
+    open/high/low/close/volume, arithmetic, comparisons, and/or/not and the
+    functions in `self.functions`, e.g.
+        "cross_above(sma(50), sma(200), 5) and rsi(14) < 30"
+    Each distinct sub-expression is computed once for all symbols and memoized,
+    so repeated screens over the same matrix reuse indicators already computed.
+    """
+
+    def __init__(self, matrix: dict):
+        self.matrix = matrix
+        self._memo = {}
+        close = matrix["close"]
+
+        def series(x):
+            # Constants ("cross_above(close, 100)", "sma(20, 5)") apply to every symbol and bar
+            return np.broadcast_to(np.asarray(x, dtype=np.float64), close.shape)
+
+        self.functions = {
+            "sma": lambda n, src=close: ta.sma(series(src), _period(n)),
+            "ema": lambda n, src=close: ta.ema(series(src), _period(n)),
+            "rsi": lambda n=14, src=close: ta.rsi(series(src), _period(n)),
+            "macd": lambda fast=12, slow=26, signal=9, src=close: ta.macd(series(src), _period(fast), _period(slow), _period(signal))["macd"],
+            "macd_signal": lambda fast=12, slow=26, signal=9, src=close: ta.macd(series(src), _period(fast), _period(slow), _period(signal))["signal"],
+            "macd_hist": lambda fast=12, slow=26, signal=9, src=close: ta.macd(series(src), _period(fast), _period(slow), _period(signal))["hist"],
+            "bb_upper": lambda n=20, k=2.0, src=close: ta.bbands(series(src), _period(n), float(k))["upper"],
+            "bb_lower": lambda n=20, k=2.0, src=close: ta.bbands(series(src), _period(n), float(k))["lower"],
+            "atr": lambda n=14: ta.atr(matrix["high"], matrix["low"], close, _period(n)),
+            "highest": lambda n, src=close: _rolling(series(src), _period(n), np.max),
+            "lowest": lambda n, src=close: _rolling(series(src), _period(n), np.min),
+            "pct_change": lambda n=1, src=close: _pct_change(series(src), _period(n)),
+            "cross_above": lambda a, b, days=1: _cross(series(a), series(b), _period(days), True),
+            "cross_below": lambda a, b, days=1: _cross(series(a), series(b), _period(days), False),
+        }
+
+    def parse(self, expression: str) -> ast.AST:
+        try:
+            tree = ast.parse(expression, mode="eval").body
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression '{expression}': {e.msg}") from None
+        callees = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in self.functions or node.keywords:
+                    raise ValueError(f"Unknown function in '{expression}'; expected one of {sorted(self.functions)}")
+                callees.add(id(node.func))
+            elif isinstance(node, ast.Name):
+                if node.id not in PRICES and id(node) not in callees:
+                    raise ValueError(f"Unknown name '{node.id}'; prices are {list(PRICES)}")
+            elif isinstance(node, ast.Constant):
+                if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+                    raise ValueError(f"Only numeric constants are allowed in '{expression}'")
+            elif not isinstance(node, (ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+                                       ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+                                       ast.Compare, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Load)):
+                raise ValueError(f"Unsupported syntax '{type(node).__name__}' in '{expression}'")
+        return tree
+
+    def eval(self, node: ast.AST):
+        key = ast.dump(node)
+        if key not in self._memo:
+            if len(self._memo) >= MAX_MEMO:
+                self._memo.clear()
+            self._memo[key] = self._eval(node)
+        return self._memo[key]
+
+    def _eval(self, node: ast.AST):
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            return self.matrix[node.id]
+        if isinstance(node, ast.Call):
+            args = [a.value if isinstance(a, ast.Constant) else self.eval(a) for a in node.args]
+            return self.functions[node.func.id](*args)
+        if isinstance(node, ast.UnaryOp):
+            value = self.eval(node.operand)
+            return np.logical_not(value) if isinstance(node.op, ast.Not) else -value
+        if isinstance(node, ast.BinOp):
+            left, right = self.eval(node.left), self.eval(node.right)
+            ops = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return ops[type(node.op)](left, right)
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = self.eval(node.values[0])
+            for value in node.values[1:]:
+                result = combine(result, self.eval(value))
+            return result
+        if isinstance(node, ast.Compare):
+            ops = {ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal}
+            result, left = True, self.eval(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self.eval(comparator)
+                result = np.logical_and(result, ops[type(op)](left, right))
+                left = right
+            return result
+        raise ValueError(f"Unsupported syntax '{type(node).__name__}'")
+
+    def metrics(self, tree: ast.AST) -> dict:
+        """Numeric sub-expressions of a filter (calls and price names) -> their source text."""
+        out = {}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id in PRICES:
+                out.setdefault(node.id, node)
+            elif isinstance(node, ast.Call) and not node.func.id.startswith("cross_"):
+                out.setdefault(ast.unparse(node), node)
+        return out
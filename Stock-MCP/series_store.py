@@ -0,0 +1,214 @@
+import os
+import json
+import asyncio
+from datetime import date
+import numpy as np
+
+# Per-symbol daily bars kept as memory-mapped .npy files:
+#   <SYMBOL>.<kind>.<gen>.dates.npy   int64 days since 1970-01-01, ascending
+#   <SYMBOL>.<kind>.<gen>.values.npy  float64, shape (len(COLUMNS), n) so each column is contiguous
+#   <SYMBOL>.<kind>.meta.json         names the current generation
+# A rewrite goes to a new generation and switches to it by replacing the meta file last,
+# so readers never see a half-written series and files still mapped by a reader are
+# never replaced (Windows refuses that). A symbol starts from a 'compact' download unless
+# a caller needs older history ('full' is premium-only for free keys); after that only
+# 'compact' fetches are needed to append new bars.
+STORE_DIR = os.getenv("STOCK_STORE_DIR", "series_store")
+COLUMNS = ("open", "high", "low", "close", "adjusted_close", "volume")
+COL = {name: i for i, name in enumerate(COLUMNS)}
+# A compact response holds the latest 100 trading days (~140 calendar days).
+COMPACT_BARS = 100
+COMPACT_SPAN_DAYS = 140
+
+_FIELDS = {
+    True: ("1. open", "2. high", "3. low", "4. close", "5. adjusted close", "6. volume"),
+    False: ("1. open", "2. high", "3. low", "4. close", "4. close", "5. volume"),
+}
+
+
+def parse_series(data: dict, adjusted: bool):
+    """AlphaVantage 'Time Series (Daily)' JSON -> (dates int64[n], values float64[6, n]), oldest first."""
+    series = data.get("Time Series (Daily)") or {}
+    keys = sorted(series)
+    dates = np.array(keys, dtype="datetime64[D]").astype(np.int64)
+    fields = _FIELDS[adjusted]
+    values = np.array([[float(series[k][f]) for k in keys] for f in fields], dtype=np.float64).reshape(len(COLUMNS), len(keys))
+    return dates, values
+
+
+def to_iso(dates) -> list:
+    return np.asarray(dates).astype("datetime64[D]").astype(str).tolist()
+
+
+def day_number(value: str) -> int:
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+class SeriesStore:
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        self._locks = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _base(self, symbol: str, adjusted: bool) -> str:
+        kind = "adj" if adjusted else "raw"
+        return os.path.join(self.root, f"{symbol.upper()}.{kind}")
+
+    def _files(self, base: str, generation) -> tuple:
+        # Series written before generations existed have none in their meta
+        stem = base if generation is None else f"{base}.{generation}"
+        return stem + ".dates.npy", stem + ".values.npy"
+
+    def _meta(self, base: str):
+        try:
+            with open(base + ".meta.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, symbol: str, adjusted: bool = True):
+        """Memory-mapped (dates, values, meta) or None when the symbol was never stored."""
+        base = self._base(symbol, adjusted)
+        meta = self._meta(base)
+        if meta is None:
+            return None
+        dates_path, values_path = self._files(base, meta.get("generation"))
+        try:
+            dates = np.load(dates_path, mmap_mode="r")
+            values = np.load(values_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return dates, values, meta
+
+    def version(self, symbol: str, adjusted: bool = True):
+        """Changes whenever the stored series is rewritten; None when it was never stored."""
+        try:
+            st = os.stat(self._base(symbol, adjusted) + ".meta.json")
+        except OSError:
+            return None
+        # The meta file is replaced (new inode) on every rewrite, even within one mtime tick
+        return st.st_mtime_ns, st.st_ino
+
+    def _save(self, symbol: str, adjusted: bool, dates, values, history: str, full_denied):
+        base = self._base(symbol, adjusted)
+        previous = (self._meta(base) or {}).get("generation")
+        generation = (previous or 0) + 1
+        for path, arr in zip(self._files(base, generation), (dates, values)):
+            with open(path, "wb") as f:
+                np.save(f, np.ascontiguousarray(arr))
+        tmp = base + ".meta.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"symbol": symbol.upper(), "adjusted": adjusted, "refreshed": date.today().isoformat(),
+                       "generation": generation, "history": history, "full_denied": full_denied}, f)
+        os.replace(tmp, base + ".meta.json")
+        self._prune(base, generation)
+
+    def _prune(self, base: str, keep: int):
+        """Delete superseded generations; ones still mapped (on Windows) go on a later save."""
+        prefix = os.path.basename(base) + "."
+        current = {os.path.basename(p) for p in self._files(base, keep)}
+        for name in os.listdir(self.root):
+            parts = name[len(prefix):].split(".") if name.startswith(prefix) else []
+            if (parts[-2:] not in (["dates", "npy"], ["values", "npy"]) or len(parts) > 3
+                    or (len(parts) == 3 and not parts[0].isdigit())):
+                continue
+            if name not in current:
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass
+
+    async def _full(self, fetch, adjusted: bool):
+        """The entire history, or None when the key may not fetch it (premium-only on free keys)."""
+        try:
+            return parse_series(await fetch("full"), adjusted)
+        except RuntimeError as e:
+            if "premium" not in str(e).lower():
+                raise
+            return None
+
+    async def get(self, symbol: str, adjusted: bool, fetch, full: bool = False):
+        """
+        Stored series for a symbol, refreshed at most once a day.
+        `fetch(outputsize)` returns the AlphaVantage JSON for 'compact' or 'full'.
+        full: the caller needs more than the latest ~100 bars. The entire history is then
+        downloaded once; when the key is refused it, that is remembered for the day and the
+        series is kept up to date from 'compact' fetches.
+        """
+        lock = self._locks.setdefault((symbol.upper(), adjusted), asyncio.Lock())
+        async with lock:
+            stored = self.load(symbol, adjusted)
+            meta = stored[2] if stored else {}
+            today_iso = date.today().isoformat()
+            # Series stored before "history" was recorded came from full downloads
+            history = meta.get("history", "full") if stored else "compact"
+            denied = meta.get("full_denied")
+            may_full = denied != today_iso
+            if (stored and meta.get("refreshed") == today_iso
+                    and not (full and history != "full" and may_full)):
+                return stored[0], stored[1]
+
+            today = int(np.datetime64(date.today(), "D").astype(np.int64))
+            restart = stored is None or len(stored[0]) == 0 or today - int(stored[0][-1]) > COMPACT_SPAN_DAYS
+            series = None
+            if may_full and (full or history == "full") and (restart or history != "full"):
+                series = await self._full(fetch, adjusted)
+                denied = today_iso if series is None else denied
+            if series is not None:
+                (dates, values), history = series, "full"
+            else:
+                new_dates, new_values = parse_series(await fetch("compact"), adjusted)
+                if restart:
+                    dates, values, history = new_dates, new_values, "compact"
+                else:
+                    old_dates, old_values = stored[0], stored[1]
+                    overlap = np.isin(new_dates, old_dates)
+                    col = COL["adjusted_close"]
+                    idx = np.searchsorted(old_dates, new_dates[overlap])
+                    # A split or dividend rewrites the whole adjusted history: reload it
+                    if adjusted and not np.allclose(old_values[col, idx], new_values[col, overlap], rtol=1e-6):
+                        if history == "full" and may_full:
+                            series = await self._full(fetch, adjusted)
+                            denied = today_iso if series is None else denied
+                        if series is not None:
+                            dates, values = series
+                        else:
+                            dates, values, history = new_dates, new_values, "compact"
+                    else:
+                        fresh = new_dates > old_dates[-1]
+                        dates = np.concatenate([old_dates, new_dates[fresh]])
+                        values = np.concatenate([old_values, new_values[:, fresh]], axis=1)
+            self._save(symbol, adjusted, dates, values, history, denied)
+            stored = self.load(symbol, adjusted)
+            return stored[0], stored[1]
+
+def bars(values, adjusted: bool = True) -> dict:
+    """
+    open/high/low/close rows of a stored series. With `adjusted`, close is the
+    adjusted close and open/high/low are scaled by the same split/dividend factor.
+    """
+    close = np.asarray(values[COL["close"]])
+    if not adjusted:
+        return {name: np.asarray(values[COL[name]]) for name in ("open", "high", "low", "close")}
+    adj = np.asarray(values[COL["adjusted_close"]])
+    factor = np.divide(adj, close, out=np.ones_like(adj), where=close != 0)
+    return {"open": values[COL["open"]] * factor, "high": values[COL["high"]] * factor,
+            "low": values[COL["low"]] * factor, "close": adj}
+
+
+def span(dates, start: str | None = None, end: str | None = None, last: int | None = None):
+    """Index range [lo, hi) covering [start, end] (ISO dates, inclusive) and/or the last N bars."""
+    lo = np.searchsorted(dates, day_number(start), "left") if start else 0
+    hi = np.searchsorted(dates, day_number(end), "right") if end else len(dates)
+    if last is not None:
+        lo = max(lo, hi - last)
+    return int(lo), int(hi)
+
+
+def window(dates, values, start: str | None = None, end: str | None = None, last: int | None = None):
+    """Slice a stored series to [start, end] (ISO dates, inclusive) and/or its last N bars."""
+    lo, hi = span(dates, start, end, last)
+    return dates[lo:hi], values[:, lo:hi]
+
+
+store = SeriesStore()
@@ -1,62 +1,343 @@
 from dotenv import load_dotenv
-import requests
 import os
+import time
+import asyncio
+from datetime import datetime, timezone
+import numpy as np
+from aiohttp import ClientError
 from fastmcp import FastMCP
+from mcp_common.http import get_session, http_lifespan
+from mcp_common.transport import run
+from rate_limiter import TokenBucket
+from quote_cache import QuoteCache
+from series_store import store, window, span, bars, to_iso, COL, COMPACT_BARS
+import indicators as ta
+from screener import Screen, align
 
 load_dotenv()
-url = "https://www.alphavantage.co/query"
+url = os.getenv("ALPHAVANTAGE_URL", "https://www.alphavantage.co/query")
 
 key = os.getenv("STOCK_API")
 
 if not key:
     raise RuntimeError("Missing ALPHAVANTAGE_API_KEY in environment")
 
-mcp = FastMCP("Stock-MCP")
+# Requests per minute allowed by the AlphaVantage plan (free tier: 5)
+RPM = float(os.getenv("STOCK_API_RPM", "5"))
+RATE_LIMIT_RETRIES = 3
+# Seconds a quote is served from memory before it is refetched
+QUOTE_TTL = float(os.getenv("STOCK_QUOTE_TTL", "60"))
+# Seconds `quotes` waits for symbols queued behind the rate limiter before answering partially
+QUOTE_WAIT = float(os.getenv("STOCK_QUOTE_WAIT", "15"))
 
-def _call(params: dict) -> dict:
+mcp = FastMCP("Stock-MCP", lifespan=http_lifespan)
+limiter = TokenBucket(RPM)
+quote_cache = QuoteCache(QUOTE_TTL)
+
+def _rate_limited(data: dict) -> bool:
+    # AlphaVantage reports throttling in "Note" (older) or "Information" (newer) with HTTP 200.
+    # Only per-minute throttling is worth waiting out; a spent daily allowance is not.
+    message = (data.get("Note") or data.get("Information") or "").lower()
+    if "per day" in message:
+        return False
+    return "Note" in data or "rate limit" in message or "per minute" in message
+
+async def _call(params: dict) -> dict:
     params = {**params, "apikey": key}
-    r = requests.get(url, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
-    # AlphaVantage “errors”
-    if "Note" in data:
-        # rate limit or usage note
-        raise RuntimeError(data["Note"])
-    if "Error Message" in data:
-        raise RuntimeError(data["Error Message"])
-    return data
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        await limiter.acquire()
+        async with get_session().get(url, params=params) as r:
+            r.raise_for_status()
+            data = await r.json(content_type=None)
+        # AlphaVantage “errors”
+        if _rate_limited(data):
+            if attempt == RATE_LIMIT_RETRIES:
+                raise RuntimeError(data.get("Note") or data.get("Information"))
+            # rate limit hit anyway (shared key, other clients): queue behind a full refill
+            limiter.drain()
+            continue
+        if "Error Message" in data:
+            raise RuntimeError(data["Error Message"])
+        if "Information" in data:
+            raise RuntimeError(data["Information"])
+        return data
 
 @mcp.tool()
-def global_quote(symbol: str) -> dict:
+async def global_quote(symbol: str) -> dict:
     """
     Get the latest quote for a stock symbol.
     Returns AlphaVantage 'Global Quote' JSON.
     """
-    return _call({"function": "GLOBAL_QUOTE", "symbol": symbol})
+    data, _ = await quote_cache.get(symbol.upper(), _fetch_quote)
+    return data
+
+async def _fetch_quote(symbol: str) -> dict:
+    data = await _call({"function": "GLOBAL_QUOTE", "symbol": symbol})
+    if not data.get("Global Quote"):
+        raise RuntimeError(f"No quote for symbol '{symbol}'")
+    return data
+
+def _compact_quote(data: dict) -> dict:
+    q = data["Global Quote"]
+
+    def num(k):
+        value = (q.get(k) or "").rstrip("%")
+        return float(value) if value else None
+
+    return {
+        "price": num("05. price"),
+        "open": num("02. open"),
+        "high": num("03. high"),
+        "low": num("04. low"),
+        "previous_close": num("08. previous close"),
+        "change": num("09. change"),
+        "change_percent": num("10. change percent"),
+        "volume": num("06. volume"),
+        "latest_trading_day": q.get("07. latest trading day"),
+    }
 
 @mcp.tool()
-def time_series_daily(symbol: str, adjusted: bool = True, outputsize: str = "compact") -> dict:
+async def quotes(symbols: list[str], max_age_seconds: float | None = None, wait_seconds: float | None = None) -> dict:
     """
-    Get daily (adjusted or unadjusted) time series.
-    outputsize: 'compact' (latest ~100) or 'full' (entire history).
+    Latest quotes for many symbols in one call.
+    Quotes younger than max_age_seconds (default STOCK_QUOTE_TTL) come from memory; the rest
+    are fetched through the rate limiter, waiting at most wait_seconds (default STOCK_QUOTE_WAIT).
+    Symbols still queued when the wait ends are listed in `pending` (their last known quote,
+    if any, is returned with stale=true) and are cached for the next call.
+    Returns { quotes: {SYMBOL: {price, change, change_percent, volume, ..., fetched_at, age_seconds, stale}},
+              pending: [SYMBOL], errors: {SYMBOL: message} }.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    found, pending, errors = await quote_cache.get_many(
+        symbols, _fetch_quote, max_age_seconds, QUOTE_WAIT if wait_seconds is None else wait_seconds)
+    now = time.time()
+    out = {}
+    for symbol in symbols:
+        if symbol not in found:
+            continue
+        data, fetched_at, stale = found[symbol]
+        out[symbol] = {
+            **_compact_quote(data),
+            "fetched_at": datetime.fromtimestamp(fetched_at, timezone.utc).isoformat(timespec="seconds"),
+            "age_seconds": round(now - fetched_at, 1),
+            "stale": stale,
+        }
+    return {"quotes": out, "pending": pending, "errors": errors}
+
+async def daily_series(symbol: str, adjusted: bool = True, full: bool = False):
+    """
+    Locally stored daily bars for a symbol, topped up from AlphaVantage at most once a day.
+    full: more than the latest ~100 bars are needed (see SeriesStore.get).
     """
     fn = "TIME_SERIES_DAILY_ADJUSTED" if adjusted else "TIME_SERIES_DAILY"
-    return _call({"function": fn, "symbol": symbol, "outputsize": outputsize})
+
+    async def fetch(outputsize: str):
+        return await _call({"function": fn, "symbol": symbol, "outputsize": outputsize})
+
+    return await store.get(symbol, adjusted, fetch, full)
+
+@mcp.tool()
+async def time_series_daily(symbol: str, adjusted: bool = True, outputsize: str = "compact",
+                            start: str | None = None, end: str | None = None) -> dict:
+    """
+    Get daily (adjusted or unadjusted) time series from the local series store.
+    outputsize: 'compact' (latest ~100) or 'full' (entire history).
+    start / end: optional ISO dates (inclusive) to slice the history; they override outputsize.
+    Returns columns: { symbol, dates, open, high, low, close, adjusted_close, volume }.
+    """
+    dates, values = await daily_series(symbol, adjusted, full=outputsize == "full" or bool(start))
+    last = COMPACT_BARS if outputsize == "compact" and not (start or end) else None
+    dates, values = window(dates, values, start, end, last)
+    out = {"symbol": symbol.upper(), "dates": to_iso(dates)}
+    for name, i in COL.items():
+        if name == "adjusted_close" and not adjusted:
+            continue
+        out[name] = values[i].tolist()
+    return out
+
+def _values(arr) -> list:
+    return [None if v != v else round(v, 4) for v in np.asarray(arr).tolist()]
 
 @mcp.tool()
-def rsi(symbol: str, interval: str = "daily", time_period: int = 14, series_type: str = "close") -> dict:
+async def rsi(symbol: str, interval: str = "daily", time_period: int = 14, series_type: str = "close") -> dict:
     """
-    Compute RSI technical indicator via AlphaVantage.
+    Compute RSI technical indicator (AlphaVantage 'Technical Analysis: RSI' JSON).
     interval: '1min','5min','15min','30min','60min','daily','weekly','monthly'
     series_type: 'close','open','high','low'
+    Daily RSI is computed locally from the unadjusted series store (TIME_SERIES_DAILY, which
+    free keys can use); other intervals, or a daily series that cannot be fetched, call AlphaVantage.
     """
-    return _call({
+    remote = {
         "function": "RSI",
         "symbol": symbol,
         "interval": interval,
         "time_period": time_period,
         "series_type": series_type
-    })
+    }
+    if interval != "daily":
+        return await _call(remote)
+    if time_period < 1:
+        return {"error": f"time_period must be at least 1, got {time_period}"}
+    try:
+        dates, values = await daily_series(symbol, False)
+    except (ClientError, asyncio.TimeoutError, RuntimeError, ValueError):
+        dates = ()
+    if not len(dates):
+        return await _call(remote)
+    series = bars(values, False)
+    if series_type not in series:
+        return {"error": f"Unknown series_type '{series_type}'"}
+    points = ta.rsi(series[series_type], time_period)
+    iso = to_iso(dates)
+    analysis = {iso[i]: {"RSI": f"{points[i]:.4f}"}
+                for i in range(len(iso) - 1, -1, -1) if not np.isnan(points[i])}
+    return {
+        "Meta Data": {
+            "1: Symbol": symbol.upper(),
+            "2: Indicator": "Relative Strength Index (RSI)",
+            "3: Last Refreshed": iso[-1] if iso else None,
+            "4: Interval": interval,
+            "5: Time Period": time_period,
+            "6: Series Type": series_type,
+            "7: Time Zone": "US/Eastern Time",
+        },
+        "Technical Analysis: RSI": analysis,
+    }
+
+@mcp.tool()
+async def indicators(symbols: list[str], specs: list[dict] | None = None, adjusted: bool = False,
+                     last: int = 30, start: str | None = None, end: str | None = None) -> dict:
+    """
+    Compute daily technical indicators locally for many symbols at once.
+    specs: e.g. [{"name": "rsi", "period": 14}, {"name": "sma", "period": 50},
+                 {"name": "ema", "period": 20, "series_type": "high"},
+                 {"name": "macd", "fast": 12, "slow": 26, "signal": 9},
+                 {"name": "bbands", "period": 20, "k": 2}, {"name": "atr", "period": 14}]
+           (default: rsi 14). Indicators use the full stored history, then the
+           output is sliced to start / end (ISO dates) and/or the last N bars.
+    adjusted: use split/dividend-adjusted prices (TIME_SERIES_DAILY_ADJUSTED, premium-only on free keys).
+    Returns { results: {SYMBOL: {dates, <label>: values | {line: values}}}, errors: {SYMBOL|label: message} }.
+    """
+    specs = specs or [{"name": "rsi", "period": 14}]
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    full = bool(start) or last + max(map(ta.lookback, specs)) > COMPACT_BARS
+    loaded = await asyncio.gather(*(daily_series(s, adjusted, full) for s in symbols), return_exceptions=True)
+    errors = {s: str(r) for s, r in zip(symbols, loaded) if isinstance(r, Exception)}
+    ok = [(s, r) for s, r in zip(symbols, loaded) if not isinstance(r, Exception) and len(r[0])]
+    errors.update({s: "No daily data" for s, r in zip(symbols, loaded)
+                   if not isinstance(r, Exception) and not len(r[0])})
+    if not ok:
+        return {"results": {}, "errors": errors}
+
+    # One (symbols x time) matrix per price field, so each indicator is a single pass
+    per_symbol = [bars(values, adjusted) for _, (_, values) in ok]
+    matrix = {f: ta.stack([b[f] for b in per_symbol]) for f in ("open", "high", "low", "close")}
+    width = matrix["close"].shape[1]
+    spans = [span(dates, start, end, last) for _, (dates, _) in ok]
+    results = {s: {"dates": to_iso(dates[lo:hi])} for (s, (dates, _)), (lo, hi) in zip(ok, spans)}
+
+    for spec in specs:
+        try:
+            out = ta.evaluate(spec, matrix)
+            name = ta.label(spec)
+        except (KeyError, ValueError, TypeError) as e:
+            errors[str(spec.get("name"))] = str(e)
+            continue
+        for row, ((s, (dates, _)), (lo, hi)) in enumerate(zip(ok, spans)):
+            offset = width - len(dates)
+            if isinstance(out, dict):
+                results[s][name] = {k: _values(v[row, offset + lo:offset + hi]) for k, v in out.items()}
+            else:
+                results[s][name] = _values(out[row, offset + lo:offset + hi])
+    return {"results": results, "errors": errors}
+
+# Aligned screening matrices keyed by (symbols, adjusted), reused until a member series is rewritten
+_panels = {}
+MAX_PANELS = 4
+
+def _panel(symbols: list, adjusted: bool):
+    """(names, dates, matrix, Screen, missing) for the stored series of `symbols`."""
+    key = (tuple(symbols), adjusted)
+    stamp = tuple(store.version(s, adjusted) for s in symbols)
+    cached = _panels.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    series, missing = {}, []
+    for symbol, version in zip(symbols, stamp):
+        stored = store.load(symbol, adjusted) if version is not None else None
+        if stored is None or not len(stored[0]):
+            missing.append(symbol)
+            continue
+        dates, values = stored[0], stored[1]
+        series[symbol] = (dates, {**bars(values, adjusted), "volume": values[COL["volume"]]})
+    names, dates, matrix = align(series)
+    panel = (names, dates, matrix, Screen(matrix), missing)
+    if len(_panels) >= MAX_PANELS:
+        _panels.pop(next(iter(_panels)))
+    _panels.pop(key, None)
+    _panels[key] = (stamp, panel)
+    return panel
+
+@mcp.tool()
+async def screen(symbols: list[str], expression: str, metrics: list[str] | None = None,
+                 sort_by: str | None = None, descending: bool = True, limit: int = 50,
+                 adjusted: bool = False, refresh: bool = False) -> dict:
+    """
+    Screen many symbols at once on their latest daily bar.
+    expression: condition over open/high/low/close/volume and the functions
+        sma(n), ema(n), rsi(n), macd(), macd_signal(), macd_hist(), bb_upper(n, k), bb_lower(n, k),
+        atr(n), highest(n), lowest(n), pct_change(n), cross_above(a, b, days), cross_below(a, b, days)
+        (series functions take an optional price as last argument, e.g. sma(20, volume)), e.g.
+        "cross_above(sma(50), sma(200), 5) and rsi(14) < 30".
+    metrics: extra expressions to report for each match; values used in `expression` are always reported.
+    sort_by: expression to order matches by.
+    refresh: False screens the locally stored history only (symbols never downloaded are listed in
+        `missing`); True first tops up every series from AlphaVantage (rate limited).
+    adjusted: screen split/dividend-adjusted prices (TIME_SERIES_DAILY_ADJUSTED, premium-only on free keys).
+    Returns { as_of, matches: [{symbol, <metric>: value}], evaluated, missing, outdated, elapsed_ms }.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    errors = {}
+    if refresh:
+        loaded = await asyncio.gather(*(daily_series(s, adjusted) for s in symbols), return_exceptions=True)
+        errors = {s: str(r) for s, r in zip(symbols, loaded) if isinstance(r, Exception)}
+    started = time.perf_counter()
+    names, dates, matrix, engine, missing = _panel(symbols, adjusted)
+    if not names:
+        return {"as_of": None, "matches": [], "evaluated": 0, "missing": missing, "outdated": [],
+                "errors": errors, "elapsed_ms": 0.0}
+    try:
+        condition = engine.parse(expression)
+        reported = engine.metrics(condition)
+        for extra in (metrics or []) + ([sort_by] if sort_by else []):
+            reported.setdefault(extra, engine.parse(extra))
+        hit = np.asarray(engine.eval(condition))
+        if hit.dtype != bool:
+            return {"error": f"'{expression}' is not a condition (use a comparison or cross_above/cross_below)"}
+        # A constant condition ("1 < 2") is a scalar: it applies to every symbol
+        hit = np.broadcast_to(hit, matrix["close"].shape)
+        latest = {label: np.broadcast_to(engine.eval(node), matrix["close"].shape)[:, -1]
+                  for label, node in reported.items()}
+    except (ValueError, TypeError) as e:
+        return {"error": str(e)}
+
+    current = ~np.isnan(matrix["close"][:, -1])
+    rows = np.flatnonzero(hit[:, -1] & current)
+    if sort_by:
+        key = latest[sort_by][rows].astype(np.float64)
+        rows = rows[np.argsort(-key if descending else key, kind="stable")]
+    matches = [{"symbol": names[r], **{label: _values(v[r:r + 1])[0] for label, v in latest.items()
+                                       if v.dtype != bool}}
+               for r in rows[:limit]]
+    return {
+        "as_of": to_iso(dates[-1:])[0],
+        "matches": matches,
+        "evaluated": len(names),
+        "missing": missing,
+        "outdated": [names[r] for r in np.flatnonzero(~current)],
+        "errors": errors,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    run(mcp, port=8105)
\ No newline at end of file
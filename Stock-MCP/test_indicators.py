@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import indicators as ta
+
+# Wilder's worked example (as published by StockCharts); AlphaVantage's RSI uses the same definition.
+CLOSES = [44.3389, 44.0902, 44.1497, 43.6124, 44.3278, 44.8264, 45.0955, 45.4245, 45.8433,
+          46.0826, 45.8931, 46.0328, 45.6140, 46.2820, 46.2820, 46.0028, 46.0328, 46.4116,
+          46.2222, 45.6439, 46.2122, 46.2521, 45.7137, 46.4515, 45.7835, 45.3548, 44.0288,
+          44.1783, 44.2181, 44.5672, 43.4205, 42.6628, 43.1314]
+EXPECTED_RSI = [70.53, 66.32, 66.55, 69.41, 66.36, 57.97, 62.93, 63.26, 56.06, 62.38,
+                54.71, 50.42, 39.99, 41.46, 41.87, 45.46, 37.30, 33.08, 37.77]
+
+
+def test_rsi_matches_reference():
+    got = ta.rsi(CLOSES, 14)
+    assert np.isnan(got[:14]).all()
+    np.testing.assert_allclose(got[14:], EXPECTED_RSI, atol=0.005)
+
+
+def test_batch_matches_single_series():
+    # Several symbols with different history lengths in one pass match one-at-a-time results
+    batch = ta.rsi(ta.stack([CLOSES, CLOSES[5:]]), 14)
+    np.testing.assert_allclose(batch[0], ta.rsi(CLOSES, 14), equal_nan=True)
+    np.testing.assert_allclose(batch[1, 5:], ta.rsi(CLOSES[5:], 14), equal_nan=True)
+
+
+@pytest.mark.parametrize("spec", [{"name": "rsi", "period": 0}, {"name": "ema", "period": -1},
+                                  {"name": "macd", "slow": 0}])
+def test_evaluate_rejects_periods_below_one(spec):
+    bars = {f: np.asarray([CLOSES]) for f in ("open", "high", "low", "close")}
+    with pytest.raises(ValueError):
+        ta.evaluate(spec, bars)
+
+
+@pytest.mark.parametrize("spec, bars", [({"name": "rsi"}, 14), ({"name": "sma", "period": 200}, 200),
+                                        ({"name": "macd"}, 35), ({"name": "nope"}, 0),
+                                        ({"name": "ema", "period": "x"}, 0)])
+def test_lookback(spec, bars):
+    assert ta.lookback(spec) == bars
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from screener import Screen
+
+CLOSE = np.array([[1.0, 2.0, 3.0, 2.0, 1.0, 2.0, 3.0],
+                  [3.0, 2.0, 1.0, 2.0, 3.0, 2.0, 1.0]])
+
+
+@pytest.fixture
+def screen():
+    return Screen({"open": CLOSE, "high": CLOSE + 1, "low": CLOSE - 1, "close": CLOSE, "volume": CLOSE * 100})
+
+
+def hits(screen, expression):
+    return np.asarray(screen.eval(screen.parse(expression)))[:, -1].tolist()
+
+
+def test_cross_against_constant(screen):
+    assert hits(screen, "cross_above(close, 1.5, 2)") == [True, False]
+    assert hits(screen, "cross_below(close, 2.5, 2)") == [False, True]
+
+
+@pytest.mark.parametrize("expression", ["cross_above(1, 2)", "sma(3, 5) > 1", "highest(3, 5) > 1",
+                                        "pct_change(1, 5) > 0", "bb_upper(3, 2, 5) > 0"])
+def test_constant_arguments_cover_every_symbol(screen, expression):
+    assert np.asarray(screen.eval(screen.parse(expression))).shape == CLOSE.shape
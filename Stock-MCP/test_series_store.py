@@ -0,0 +1,62 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from series_store import SeriesStore
+
+PREMIUM = ("Thank you for using Alpha Vantage! The outputsize=full parameter value is a premium feature "
+           "for the TIME_SERIES_DAILY endpoint.")
+
+
+def payload(days: int) -> dict:
+    """AlphaVantage-shaped unadjusted series of `days` consecutive days ending today."""
+    today = date.today()
+    bar = {"1. open": "1.0", "2. high": "2.0", "3. low": "0.5", "4. close": "1.5", "5. volume": "100"}
+    return {"Time Series (Daily)": {(today - timedelta(days=i)).isoformat(): bar for i in range(days)}}
+
+
+class Upstream:
+    """fetch(outputsize) double recording every call; 'full' is refused like a free key unless `premium`."""
+
+    def __init__(self, premium: bool = False):
+        self.premium = premium
+        self.calls = []
+
+    async def __call__(self, outputsize: str):
+        self.calls.append(outputsize)
+        if outputsize == "full" and not self.premium:
+            raise RuntimeError(PREMIUM)
+        return payload(300 if outputsize == "full" else 100)
+
+
+def test_new_symbol_starts_from_compact(tmp_path):
+    store, upstream = SeriesStore(str(tmp_path)), Upstream()
+    dates, _ = asyncio.run(store.get("IBM", False, upstream))
+    assert upstream.calls == ["compact"] and len(dates) == 100
+
+
+def test_refused_full_history_falls_back_once_a_day(tmp_path):
+    store, upstream = SeriesStore(str(tmp_path)), Upstream()
+    dates, _ = asyncio.run(store.get("IBM", False, upstream, full=True))
+    assert upstream.calls == ["full", "compact"] and len(dates) == 100
+    # Stored today and the refusal is remembered: no further upstream calls
+    asyncio.run(store.get("IBM", False, upstream, full=True))
+    assert upstream.calls == ["full", "compact"]
+
+
+def test_full_history_fetched_when_needed(tmp_path):
+    store, upstream = SeriesStore(str(tmp_path)), Upstream(premium=True)
+    asyncio.run(store.get("IBM", False, upstream))
+    dates, _ = asyncio.run(store.get("IBM", False, upstream, full=True))
+    assert upstream.calls == ["compact", "full"] and len(dates) == 300
+    asyncio.run(store.get("IBM", False, upstream, full=True))
+    assert upstream.calls == ["compact", "full"]
+
+
+def test_other_errors_propagate(tmp_path):
+    async def fetch(outputsize):
+        raise RuntimeError("Invalid API call.")
+
+    with pytest.raises(RuntimeError, match="Invalid API call"):
+        asyncio.run(SeriesStore(str(tmp_path)).get("IBM", False, fetch, full=True))
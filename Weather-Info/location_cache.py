@@ -0,0 +1,66 @@
+import os
+import time
+import sqlite3
+import threading
+
+# City search results practically never change, so keys are kept for a long time
+# and the least recently used entries are evicted once the table is full.
+CACHE_PATH = os.getenv("WEATHER_LOCATION_CACHE", "location_cache.db")
+TTL_SECONDS = float(os.getenv("WEATHER_LOCATION_TTL", str(90 * 86400)))
+MAX_ENTRIES = int(os.getenv("WEATHER_LOCATION_MAX", "2000"))
+
+
+def normalize(query: str) -> str:
+    """'  New   York ' and 'new york' share one entry."""
+    return " ".join(query.casefold().split())
+
+
+class LocationCache:
+    """SQLite-backed map from normalized city queries to AccuWeather location keys."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS locations ("
+            " query TEXT PRIMARY KEY, location_key TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, query: str):
+        q = normalize(query)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT location_key, created FROM locations WHERE query = ?", (q,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM locations WHERE query = ?", (q,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE locations SET last_used = ? WHERE query = ?", (now, q))
+            self._db.commit()
+            return row[0]
+
+    def put(self, query: str, location_key: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO locations (query, location_key, created, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                (normalize(query), location_key, now, now),
+            )
+            self._db.execute(
+                "DELETE FROM locations WHERE query IN ("
+                " SELECT query FROM locations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+
+location_cache = LocationCache()
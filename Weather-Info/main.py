@@ -1,8 +1,8 @@
 import os 
-import json 
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
-from aiohttp import ClientSession
+from mcp_common.http import get_session, http_lifespan
+from mcp_common.transport import run
 import asyncio
 import sys
 
@@ -10,37 +10,94 @@ import sys
 
 # Load and access the api key
 load_dotenv()
+from location_cache import location_cache  # reads its settings from the environment
+from response_cache import response_cache
+from projection import loads, compact_current, compact_forecast
 
 # constants
 api_key = os.getenv("API_KEY")
-base_url = "https://dataservice.accuweather.com"
+base_url = os.getenv("ACCUWEATHER_BASE_URL", "https://dataservice.accuweather.com")
 
 # Create an MCP server
-mcp = FastMCP("Weather-Info")
+mcp = FastMCP("Weather-Info", lifespan=http_lifespan)
 
 # Helper function to get the location ID where we want to find the weather
+# Keys are served from the persistent location cache; only unseen cities hit the search API.
 async def location_id(location: str):
-    async with ClientSession() as session:
-        location_search_url = f"{base_url}/locations/v1/cities/search"
-        if not api_key:
-            return f"No API key available"
-        params = {
-            "apikey": api_key,
-            "q": location,
-        }
-        async with session.get(location_search_url, params=params) as response:
-            locations = await response.json()
-            if locations and len(locations) > 0:
-                location_key = locations[0]["Key"]
-                return location_key
-            return None
+    cached_key = location_cache.get(location)
+    if cached_key:
+        return cached_key
+
+    session = get_session()
+    location_search_url = f"{base_url}/locations/v1/cities/search"
+    if not api_key:
+        return f"No API key available"
+    params = {
+        "apikey": api_key,
+        "q": location,
+    }
+    async with session.get(location_search_url, params=params) as response:
+        locations = loads(await response.read())
+        if locations and len(locations) > 0:
+            location_key = locations[0]["Key"]
+            location_cache.put(location, location_key)
+            return location_key
+        return None
+
+
+# Response cache lifetimes (seconds). Stale entries are served while a refresh runs.
+CONDITIONS_TTL = 10 * 60
+CONDITIONS_STALE_TTL = 30 * 60
+FORECAST_TTL = 3 * 60 * 60
+FORECAST_STALE_TTL = 6 * 60 * 60
+
+
+class UpstreamError(Exception):
+    """Non-200 answer from AccuWeather; raised so failures are never cached."""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+async def _get_json(url: str, params: dict):
+    async with get_session().get(url, params=params) as response:
+        if response.status != 200:
+            raise UpstreamError(response.status)
+        return loads(await response.read())
+
+
+async def current_conditions(city_key: str, metric: bool = True):
+    """Current conditions for a location key, shared through the response cache."""
+    async def fetch():
+        return await _get_json(
+            f"{base_url}/currentconditions/v1/{city_key}",
+            {"apikey": api_key, "metric": str(metric).lower()},
+        )
+    return await response_cache.get(("conditions", city_key, metric), fetch,
+                                    CONDITIONS_TTL, CONDITIONS_STALE_TTL)
+
+
+async def daily_forecast(city_key: str, metric: bool = True):
+    """5-day forecast for a location key, shared through the response cache."""
+    async def fetch():
+        return await _get_json(
+            f"{base_url}/forecasts/v1/daily/5day/{city_key}",
+            {"apikey": api_key, "metric": str(metric).lower()},
+        )
+    return await response_cache.get(("forecast", city_key, metric), fetch,
+                                    FORECAST_TTL, FORECAST_STALE_TTL)
 
 
 # Call the weather API and then return weather
 @mcp.tool()
-async def get_current_weather(city: str):
+async def get_current_weather(city: str, metric: bool = True, fields: list[str] | None = None):
     """
     Give me the weather for the city that the user gave you using this function.
+    Set metric=False for imperial units.
+    By default returns a compact record: observed, text, temperature, unit,
+    precipitation, precipitation_type, is_day. `fields` selects a subset or any
+    dotted AccuWeather path (e.g. "Temperature.Imperial.Value"); ["*"] returns the raw record.
     """
     try:
         # First get the location key
@@ -49,57 +106,87 @@ async def get_current_weather(city: str):
             return f"Did not find city: {city}"
 
         # Get current conditions
-        async with ClientSession() as session:
-            current_conditions_url = f"{base_url}/currentconditions/v1/{city_key}"
-            params = {
-                "apikey": api_key,
-                "metric": "true",
-            }
-
-            async with session.get(current_conditions_url, params=params) as response:
-                current_conditions = await response.json()
-
-                if current_conditions and len(current_conditions) > 0:
-                #     # Return the weather information as a formatted string
-                #     weather_text = current_conditions[0].get("WeatherText", "Unknown")
-                #     temperature = current_conditions[0].get("Temperature", {}).get("Metric", {}).get("Value", "Unknown")
-
-                    # return f"Current weather in {city}: {weather_text}, Temperature: {temperature}°C"
-                    return current_conditions
+        conditions = await current_conditions(city_key, metric)
+
+        if conditions and len(conditions) > 0:
+        #     # Return the weather information as a formatted string
+        #     weather_text = conditions[0].get("WeatherText", "Unknown")
+        #     temperature = conditions[0].get("Temperature", {}).get("Metric", {}).get("Value", "Unknown")
+
+            # return f"Current weather in {city}: {weather_text}, Temperature: {temperature}°C"
+            return compact_current(conditions, fields, metric)
     except Exception as e:
         return f"Error retrieving weather: {str(e)}"
 
 @mcp.tool()
-async def get_weather_forecast(city: str):
-    """Get the 5-day weather forecast for a city."""
+async def get_weather_forecast(city: str, metric: bool = True, fields: list[str] | None = None):
+    """
+    Get the 5-day weather forecast for a city. Set metric=False for imperial units.
+    Returns the headline plus one compact record per day: date, min, max, unit,
+    day, night, day_precipitation, night_precipitation, precipitation_type.
+    `fields` selects a subset or dotted AccuWeather paths; ["*"] returns the raw response.
+    """
     try:
         city_key = await location_id(city)
 
         if not city_key:
             return "No city key found"
 
-        async with ClientSession() as session:
-            forecast_url = f"{base_url}/forecasts/v1/daily/5day/{city_key}"
-            params = {
-                "apikey": api_key,
-                "metric": "true"
-            }
-            async with session.get(forecast_url, params=params) as response:
-                if response.status != 200:
-                    return f"Failed to retrieve forecast: {response.status}"
-                data = await response.json()
+        try:
+            data = await daily_forecast(city_key, metric)
+        except UpstreamError as e:
+            return f"Failed to retrieve forecast: {e.status}"
 
-                # Convert the entire response to a JSON string
-                return json.dumps(data)
+        return compact_forecast(data, fields, metric)
 
     except Exception as e:
         return f"Error retrieving the weather forecast: {str(e)}"
 
 
 
+MAX_CITY_CONCURRENCY = 10
+
+
+@mcp.tool()
+async def get_weather_many(cities: list[str], include_forecast: bool = False, metric: bool = True,
+                           max_concurrency: int = 5, fields: list[str] | None = None):
+    """
+    Get current weather (and optionally the 5-day forecast) for several cities in one call.
+    Cities are looked up concurrently; each entry reports its own result or error.
+    `fields` applies to both conditions and forecast days, as in the single-city tools.
+    """
+    if not api_key:
+        return {"error": "No API key available"}
+    limit = asyncio.Semaphore(max(1, min(int(max_concurrency), MAX_CITY_CONCURRENCY)))
+
+    async def one(city: str):
+        result = {"city": city}
+        try:
+            async with limit:
+                city_key = await location_id(city)
+                if not city_key:
+                    result["error"] = f"Did not find city: {city}"
+                    return result
+                result["key"] = city_key
+                fetches = [current_conditions(city_key, metric)]
+                if include_forecast:
+                    fetches.append(daily_forecast(city_key, metric))
+                data = await asyncio.gather(*fetches)
+            result["conditions"] = compact_current(data[0], fields, metric)
+            if include_forecast:
+                result["forecast"] = compact_forecast(data[1], fields, metric)
+        except UpstreamError as e:
+            result["error"] = f"Failed to retrieve weather: {e.status}"
+        except Exception as e:
+            result["error"] = f"Error retrieving weather: {str(e)}"
+        return result
+
+    return {"results": await asyncio.gather(*(one(city) for city in cities))}
+
+
 if __name__ == "__main__":
 
-    mcp.run(transport="stdio")
+    run(mcp, port=8102)
 
 # mcp dev main.py         // Insert the API key into the environment variables // success
 # But when I try it in claude it does not work it sasys that the module AIOHTTP it cannot ve read
@@ -0,0 +1,76 @@
+import json
+
+# orjson is optional; it parses AccuWeather payloads several times faster than json.
+try:
+    import orjson
+
+    def loads(data: bytes):
+        return orjson.loads(data)
+except ImportError:
+    def loads(data: bytes):
+        return json.loads(data)
+
+
+def _path(record: dict, dotted: str):
+    """Follow 'A.B.C' through nested dicts; None when any step is missing."""
+    value = record
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+# Compact field name -> dotted path into the raw AccuWeather record.
+# "{unit}" is replaced with Metric or Imperial to match the requested units.
+CURRENT_FIELDS = {
+    "observed": "LocalObservationDateTime",
+    "text": "WeatherText",
+    "temperature": "Temperature.{unit}.Value",
+    "unit": "Temperature.{unit}.Unit",
+    "precipitation": "HasPrecipitation",
+    "precipitation_type": "PrecipitationType",
+    "is_day": "IsDayTime",
+}
+
+FORECAST_FIELDS = {
+    "date": "Date",
+    "min": "Temperature.Minimum.Value",
+    "max": "Temperature.Maximum.Value",
+    "unit": "Temperature.Minimum.Unit",
+    "day": "Day.IconPhrase",
+    "night": "Night.IconPhrase",
+    "day_precipitation": "Day.HasPrecipitation",
+    "night_precipitation": "Night.HasPrecipitation",
+    "precipitation_type": "Day.PrecipitationType",
+}
+
+
+def project(record: dict, schema: dict, fields=None, metric: bool = True):
+    """
+    Reduce one raw record to `fields` (default: every compact field in `schema`).
+    A field may be a compact name or any dotted path into the raw record;
+    fields=["*"] returns the record untouched.
+    """
+    if fields and list(fields) == ["*"]:
+        return record
+    unit = "Metric" if metric else "Imperial"
+    out = {}
+    for name in fields or schema:
+        out[name] = _path(record, schema.get(name, name).format(unit=unit))
+    if "date" in out and isinstance(out["date"], str):
+        out["date"] = out["date"][:10]
+    return out
+
+
+def compact_current(conditions, fields=None, metric: bool = True):
+    return [project(c, CURRENT_FIELDS, fields, metric) for c in conditions or []]
+
+
+def compact_forecast(data: dict, fields=None, metric: bool = True):
+    if fields and list(fields) == ["*"]:
+        return data
+    return {
+        "headline": _path(data, "Headline.Text"),
+        "days": [project(d, FORECAST_FIELDS, fields, metric) for d in data.get("DailyForecasts", [])],
+    }
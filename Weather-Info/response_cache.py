@@ -0,0 +1,58 @@
+import time
+import asyncio
+
+MAX_ENTRIES = 1000
+
+
+class ResponseCache:
+    """
+    In-process TTL cache for upstream responses.
+
+    - Fresh entries (age < ttl) are returned directly.
+    - Stale entries (age < ttl + stale_ttl) are returned immediately while one
+      background task refreshes them (stale-while-revalidate).
+    - Concurrent misses for the same key share a single upstream fetch.
+    Failed fetches are never cached.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._inflight = {}
+
+    async def get(self, key, fetch, ttl: float, stale_ttl: float = 0.0):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                return value
+            if age < ttl + stale_ttl:
+                self._start(key, fetch)
+                return value
+        return await asyncio.shield(self._start(key, fetch))
+
+    def _start(self, key, fetch) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    def _done(self, key, task):
+        self._inflight.pop(key, None)
+        # Mark background failures as retrieved; callers that awaited already saw them.
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, key, fetch):
+        value = await fetch()
+        if len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries.pop(key, None)
+        self._entries[key] = (value, time.monotonic())
+        return value
+
+
+response_cache = ResponseCache()
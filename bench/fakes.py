@@ -0,0 +1,344 @@
+"""
+Local stand-ins for the upstream APIs used by the MCP servers.
+
+Each fake replays the JSON/RSS samples in bench/fixtures (or a directory of real
+recordings with the same file names) and can add latency, fail a share of
+requests and enforce a per-minute rate limit the way the real service reports it:
+
+    accuweather   AccuWeather locations / current conditions / 5-day forecast
+    newsapi       NewsAPI /v2/everything and /v2/top-headlines
+    googlenews    Google News RSS search (honours If-None-Match)
+    alphavantage  AlphaVantage /query (GLOBAL_QUOTE, TIME_SERIES_DAILY[_ADJUSTED])
+    google        Gmail messages list/get/send and Calendar events.list
+
+Every fake listens on its own port, so the per-host connection limit of the
+shared HTTP pool applies as it does against the real hosts.
+
+    python bench/fakes.py      # serve until Ctrl+C and print the env settings to use them
+"""
+
+import json
+import time
+import random
+import socket
+import asyncio
+import hashlib
+import argparse
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import numpy as np
+from aiohttp import web
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+UPSTREAMS = ("accuweather", "newsapi", "googlenews", "alphavantage", "google")
+# Bars in a generated 'full' daily series; 'compact' is the latest 100, as upstream.
+FULL_HISTORY = 600
+
+
+class Upstream:
+    """Call counting, simulated latency, error injection and a per-minute rate limit for one fake API."""
+
+    def __init__(self, name: str, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: int = 0, seed: int | None = None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.calls = Counter()
+        self.errors = 0
+        self.limited = 0
+        self._window = deque()
+        self._random = random.Random(seed)
+
+    async def admit(self, endpoint: str) -> str | None:
+        """Count a call and wait out the latency; returns 'limited', 'error' or None (serve it)."""
+        self.calls[endpoint] += 1
+        now = time.monotonic()
+        outcome = None
+        if self.rate_limit:
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+            if len(self._window) >= self.rate_limit:
+                outcome = "limited"
+            else:
+                self._window.append(now)
+        if outcome is None and self.error_rate and self._random.random() < self.error_rate:
+            outcome = "error"
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if outcome == "limited":
+            self.limited += 1
+        elif outcome == "error":
+            self.errors += 1
+        return outcome
+
+    def stats(self) -> dict:
+        return {"calls": dict(self.calls), "total": sum(self.calls.values()),
+                "errors": self.errors, "rate_limited": self.limited}
+
+
+def _load(fixtures: Path, name: str):
+    with open(fixtures / name, "rb") as f:
+        data = f.read()
+    return json.loads(data) if name.endswith(".json") else data
+
+
+def _digits(text: str, n: int = 6) -> str:
+    """Stable numeric id for a string (location keys, message ids)."""
+    return str(int(hashlib.sha1(text.encode()).hexdigest(), 16))[:n]
+
+
+def accuweather_app(upstream: Upstream, fixtures: Path = FIXTURES) -> web.Application:
+    search, current, forecast = (_load(fixtures, f"accuweather_{n}.json") for n in ("search", "current", "forecast"))
+
+    async def failure(outcome: str):
+        if outcome == "limited":
+            return web.json_response({"Code": "ServiceUnavailable",
+                                      "Message": "The allowed number of requests has been exceeded."}, status=503)
+        return web.json_response({"Code": "ServerError", "Message": "Internal server error."}, status=500)
+
+    async def locations(request):
+        if outcome := await upstream.admit("locations/search"):
+            return await failure(outcome)
+        q = request.query.get("q", "")
+        if not q.strip():
+            return web.json_response([])
+        return web.json_response([{**search[0], "Key": _digits(q.lower()), "LocalizedName": q, "EnglishName": q}])
+
+    async def conditions(request):
+        if outcome := await upstream.admit("currentconditions"):
+            return await failure(outcome)
+        return web.json_response(current)
+
+    async def daily(request):
+        if outcome := await upstream.admit("forecasts/daily/5day"):
+            return await failure(outcome)
+        return web.json_response(forecast)
+
+    app = web.Application()
+    app.router.add_get("/locations/v1/cities/search", locations)
+    app.router.add_get("/currentconditions/v1/{key}", conditions)
+    app.router.add_get("/forecasts/v1/daily/5day/{key}", daily)
+    return app
+
+
+def newsapi_app(upstream: Upstream, fixtures: Path = FIXTURES) -> web.Application:
+    articles = _load(fixtures, "newsapi_everything.json")["articles"]
+
+    def endpoint(name: str):
+        async def handler(request):
+            if outcome := await upstream.admit(name):
+                if outcome == "limited":
+                    return web.json_response({"status": "error", "code": "rateLimited", "message":
+                                              "You have made too many requests recently."}, status=429)
+                return web.json_response({"status": "error", "code": "unexpectedError",
+                                          "message": "Something went wrong."}, status=500)
+            size = int(request.query.get("pageSize", 100))
+            page = int(request.query.get("page", 1))
+            chunk = articles[(page - 1) * size:page * size]
+            return web.json_response({"status": "ok", "totalResults": len(articles), "articles": chunk})
+        return handler
+
+    app = web.Application()
+    app.router.add_get("/v2/everything", endpoint("everything"))
+    app.router.add_get("/v2/top-headlines", endpoint("top-headlines"))
+    return app
+
+
+def googlenews_app(upstream: Upstream, fixtures: Path = FIXTURES) -> web.Application:
+    feed = _load(fixtures, "google_news.xml")
+    etag = f'"{hashlib.sha1(feed).hexdigest()[:16]}"'
+
+    async def search(request):
+        if outcome := await upstream.admit("rss/search"):
+            return web.Response(status=429 if outcome == "limited" else 503, text="Sorry...")
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=feed, content_type="application/xml", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/rss/search", search)
+    return app
+
+
+def daily_series(symbol: str, adjusted: bool, bars: int) -> dict:
+    """AlphaVantage-shaped daily series: a random walk seeded by the symbol, ending on the last weekday."""
+    rng = np.random.default_rng(int(_digits(symbol, 9)))
+    end = np.datetime64("today", "D")
+    days = np.busday_offset(end, -np.arange(bars)[::-1], roll="backward")
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, bars))) + rng.uniform(0, 200)
+    opens = close * (1 + rng.normal(0, 0.004, bars))
+    high = np.maximum(opens, close) * (1 + rng.uniform(0, 0.01, bars))
+    low = np.minimum(opens, close) * (1 - rng.uniform(0, 0.01, bars))
+    volume = rng.integers(500_000, 5_000_000, bars)
+    series = {}
+    for i in range(bars - 1, -1, -1):
+        row = {"1. open": f"{opens[i]:.4f}", "2. high": f"{high[i]:.4f}",
+               "3. low": f"{low[i]:.4f}", "4. close": f"{close[i]:.4f}"}
+        if adjusted:
+            row.update({"5. adjusted close": f"{close[i]:.4f}", "6. volume": str(volume[i]),
+                        "7. dividend amount": "0.0000", "8. split coefficient": "1.0"})
+        else:
+            row["5. volume"] = str(volume[i])
+        series[str(days[i])] = row
+    return {"Meta Data": {"1. Information": "Daily Time Series with Splits and Dividend Events" if adjusted
+                          else "Daily Prices (open, high, low, close) and Volumes",
+                          "2. Symbol": symbol, "3. Last Refreshed": str(days[-1]),
+                          "4. Output Size": "Full size" if bars > 100 else "Compact",
+                          "5. Time Zone": "US/Eastern"},
+            "Time Series (Daily)": series}
+
+
+def alphavantage_app(upstream: Upstream, fixtures: Path = FIXTURES) -> web.Application:
+    quote = _load(fixtures, "alphavantage_quote.json")["Global Quote"]
+    # Generating a series costs more than serving it; keep the recent ones like a CDN would
+    series = {}
+
+    async def query(request):
+        fn = request.query.get("function", "")
+        symbol = request.query.get("symbol", "").upper()
+        if outcome := await upstream.admit(fn or "?"):
+            if outcome == "limited":
+                # AlphaVantage throttles with HTTP 200 and a note in the body
+                return web.json_response({"Note": "Thank you for using Alpha Vantage! Our standard API call "
+                                                  "frequency is 5 calls per minute and 500 calls per day."})
+            return web.Response(status=503, text="Service Unavailable")
+        if fn == "GLOBAL_QUOTE":
+            return web.json_response({"Global Quote": {**quote, "01. symbol": symbol}})
+        if fn in ("TIME_SERIES_DAILY", "TIME_SERIES_DAILY_ADJUSTED"):
+            bars = FULL_HISTORY if request.query.get("outputsize") == "full" else 100
+            key = (symbol, fn, bars)
+            if key not in series:
+                if len(series) >= 256:
+                    series.pop(next(iter(series)))
+                series[key] = json.dumps(daily_series(symbol, fn.endswith("ADJUSTED"), bars))
+            return web.Response(text=series[key], content_type="application/json")
+        return web.json_response({"Error Message": f"Invalid API call. Unknown function '{fn}'."})
+
+    app = web.Application()
+    app.router.add_get("/query", query)
+    return app
+
+
+def google_app(upstream: Upstream, fixtures: Path = FIXTURES) -> web.Application:
+    """Gmail v1 and Calendar v3 under their discovery paths (gmail/v1/..., calendar/v3/...)."""
+    message = _load(fixtures, "gmail_message.json")
+    events = _load(fixtures, "calendar_events.json")
+    sent = Counter()
+
+    async def failure(outcome: str):
+        code, status = (429, "RESOURCE_EXHAUSTED") if outcome == "limited" else (500, "INTERNAL")
+        reason = "rateLimitExceeded" if outcome == "limited" else "backendError"
+        return web.json_response({"error": {"code": code, "message": reason, "status": status,
+                                            "errors": [{"reason": reason, "message": reason}]}}, status=code)
+
+    async def list_messages(request):
+        if outcome := await upstream.admit("messages.list"):
+            return await failure(outcome)
+        q = request.query.get("q", "")
+        n = min(int(request.query.get("maxResults", 100)), 500)
+        ids = [f"{message['id'][:10]}{_digits(f'{q}:{i}')}" for i in range(n)]
+        return web.json_response({"messages": [{"id": i, "threadId": i} for i in ids],
+                                  "resultSizeEstimate": len(ids)})
+
+    async def get_message(request):
+        if outcome := await upstream.admit("messages.get"):
+            return await failure(outcome)
+        mid = request.match_info["id"]
+        body = {**message, "id": mid, "threadId": mid}
+        if request.query.get("format") == "metadata":
+            wanted = set(request.query.getall("metadataHeaders", []))
+            payload = {k: v for k, v in message["payload"].items() if k != "body"}
+            payload["headers"] = [h for h in payload["headers"] if not wanted or h["name"] in wanted]
+            body["payload"] = payload
+        return web.json_response(body)
+
+    async def send_message(request):
+        if outcome := await upstream.admit("messages.send"):
+            return await failure(outcome)
+        await request.read()
+        sent["n"] += 1
+        mid = f"{sent['n']:016x}"
+        return web.json_response({"id": mid, "threadId": mid, "labelIds": ["SENT"]})
+
+    async def list_events(request):
+        if outcome := await upstream.admit("events.list"):
+            return await failure(outcome)
+        token = f"bench-{time.time_ns()}"
+        if request.query.get("syncToken"):
+            return web.json_response({**events, "items": [], "nextSyncToken": token})
+        return web.json_response({**events, "nextSyncToken": token})
+
+    app = web.Application()
+    app.router.add_get("/gmail/v1/users/{user}/messages", list_messages)
+    app.router.add_get("/gmail/v1/users/{user}/messages/{id}", get_message)
+    app.router.add_post("/gmail/v1/users/{user}/messages/send", send_message)
+    app.router.add_get("/calendar/v3/calendars/{calendar}/events", list_events)
+    return app
+
+
+APPS = {
+    "accuweather": accuweather_app,
+    "newsapi": newsapi_app,
+    "googlenews": googlenews_app,
+    "alphavantage": alphavantage_app,
+    "google": google_app,
+}
+
+
+def environment(urls: dict) -> dict:
+    """Server settings that point every API client at the fakes."""
+    return {
+        "ACCUWEATHER_BASE_URL": urls["accuweather"],
+        "NEWS_API_BASE": f"{urls['newsapi']}/v2",
+        "GOOGLE_NEWS_RSS_URL": f"{urls['googlenews']}/rss/search",
+        "ALPHAVANTAGE_URL": f"{urls['alphavantage']}/query",
+    }
+
+
+@asynccontextmanager
+async def serve(upstreams: dict, fixtures: Path = FIXTURES, host: str = "127.0.0.1"):
+    """Start one fake per Upstream ({name: Upstream}) on a free port; yields {name: base_url}."""
+    runners, urls = [], {}
+    try:
+        for name, upstream in upstreams.items():
+            runner = web.AppRunner(APPS[name](upstream, fixtures), access_log=None)
+            await runner.setup()
+            runners.append(runner)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((host, 0))
+            await web.SockSite(runner, sock).start()
+            urls[name] = f"http://{host}:{sock.getsockname()[1]}"
+        yield urls
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the fake upstream APIs until interrupted.")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES, help="directory of recorded responses")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args(argv)
+    upstreams = {name: Upstream(name, latency=args.latency) for name in UPSTREAMS}
+    async with serve(upstreams, args.fixtures) as urls:
+        for name, value in environment(urls).items():
+            print(f"{name}={value}")
+        print(f"# Gmail / Calendar api_endpoint: {urls['google']}/ and {urls['google']}/calendar/v3/")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            for upstream in upstreams.values():
+                print(upstream.name, upstream.stats())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
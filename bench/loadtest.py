@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+"""
+Offline load test for the MCP servers in this repository.
+
+Starts the fake upstreams from bench/fakes.py, points every server at them
+(API keys, base URLs and data files all go to a throwaway directory), mounts the
+servers in one process through gateway.Gateway and calls their tools from
+`--concurrency` workers. Reports throughput, p50/p99 latency per scenario and the
+number of upstream calls per endpoint, so cache and pooling changes can be compared.
+
+    uv run python bench/loadtest.py
+    uv run python bench/loadtest.py --only weather,stock --requests 2000 --concurrency 50
+    uv run python bench/loadtest.py --latency 0.08 --error-rate newsapi=0.05 --rate-limit alphavantage=75
+    uv run python bench/loadtest.py --rounds 2 --keys 10      # round 2 shows the warm-cache numbers
+
+--latency, --jitter, --error-rate and --rate-limit take one value for every
+upstream or a list like "accuweather=0.2,google=0.1" (unlisted upstreams get 0).
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "bench"))
+
+import fakes  # noqa: E402
+
+CATEGORIES = ("business", "entertainment", "general", "health", "science", "sports", "technology")
+
+
+def _city(k):
+    return f"City {k}"
+
+
+def _topic(k):
+    return f"topic {k}"
+
+
+def _symbol(k):
+    return f"S{k:03d}"
+
+
+def _several(fn, rng, keys, n=5):
+    return [fn(rng.randrange(keys)) for _ in range(n)]
+
+
+# scenario -> (namespace, tool, arguments(key, rng, keys))
+SCENARIOS = {
+    "weather.current": ("weather", "get_current_weather", lambda k, rng, keys: {"city": _city(k)}),
+    "weather.forecast": ("weather", "get_weather_forecast", lambda k, rng, keys: {"city": _city(k)}),
+    "weather.many": ("weather", "get_weather_many", lambda k, rng, keys: {
+        "cities": _several(_city, rng, keys), "include_forecast": True}),
+    "news.latest": ("news", "get_latest_news", lambda k, rng, keys: {"query": _topic(k)}),
+    "news.headlines": ("news", "get_headlines", lambda k, rng, keys: {"category": CATEGORIES[k % len(CATEGORIES)]}),
+    "news.aggregated": ("news", "get_news_aggregated", lambda k, rng, keys: {"query": _topic(k)}),
+    "news_user.about": ("news_user", "get_latest_news_about", lambda k, rng, keys: {"query": _topic(k)}),
+    "stock.quote": ("stock", "global_quote", lambda k, rng, keys: {"symbol": _symbol(k)}),
+    "stock.quotes": ("stock", "quotes", lambda k, rng, keys: {"symbols": _several(_symbol, rng, keys)}),
+    "stock.daily": ("stock", "time_series_daily", lambda k, rng, keys: {"symbol": _symbol(k)}),
+    "stock.indicators": ("stock", "indicators", lambda k, rng, keys: {
+        "symbols": _several(_symbol, rng, keys), "specs": [{"name": "rsi"}, {"name": "sma", "period": 50}]}),
+    "gmail.search": ("gmail", "gmail_search", lambda k, rng, keys: {"query": f"from:user{k}@example.com", "limit": 5}),
+    "gmail.unread": ("gmail", "gmail_list_unread_tool", lambda k, rng, keys: {"limit": 5}),
+    "gmail.send": ("gmail", "gmail_send", lambda k, rng, keys: {
+        "to": f"user{k}@example.com", "subject": "Load test", "body": "Hello from the benchmark."}),
+    "gmail.calendar": ("gmail", "calendar_list_tool", lambda k, rng, keys: {"limit": 5}),
+}
+
+# Plain-text answers some tools give instead of an {"error": ...} payload
+_ERROR_PREFIXES = ("Error", "Failed", "Did not find", "No API key", "No city key")
+
+
+def per_upstream(text: str, cast=float) -> dict:
+    """'0.05' -> that value for every upstream; 'newsapi=0.2,google=0.1' -> those, others 0."""
+    if "=" not in text:
+        return {name: cast(text) for name in fakes.UPSTREAMS}
+    values = {name: cast(0) for name in fakes.UPSTREAMS}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, value = part.partition("=")
+        if name.strip() not in values:
+            raise SystemExit(f"Unknown upstream '{name.strip()}'; expected one of {', '.join(fakes.UPSTREAMS)}")
+        values[name.strip()] = cast(value)
+    return values
+
+
+def configure(workdir: Path, urls: dict):
+    """Point every server at the fakes and keep all of their files inside `workdir`."""
+    os.environ.update(fakes.environment(urls))
+    os.environ.update({
+        "API_KEY": "bench", "NEWS_API_KEY": "bench", "STOCK_API": "bench",
+        "WEATHER_LOCATION_CACHE": str(workdir / "location_cache.db"),
+        "NEWS_CACHE_PATH": str(workdir / "news_cache.db"),
+        "NEWS_WATCHLIST_PATH": str(workdir / "watchlist.json"),
+        "NEWS_WATCHLIST_SEEN_PATH": str(workdir / "watchlist_seen.bin"),
+        "STOCK_STORE_DIR": str(workdir / "series_store"),
+        "CALENDAR_CACHE": str(workdir / "calendar_cache.json"),
+        "GOOGLE_TOKEN": str(workdir / "token.json"),
+        "GATEWAY_MANIFEST": str(workdir / "gateway_manifest.json"),
+    })
+    # Client-side pacing stays configurable, but defaults high enough that the fakes are what throttles
+    for name, value in (("STOCK_API_RPM", "100000"), ("NEWS_API_DAILY_QUOTA", "1000000"),
+                        ("GMAIL_SEND_RATE", "1000")):
+        os.environ.setdefault(name, value)
+
+
+def patch_google(url: str):
+    """Replace the OAuth-backed Gmail/Calendar clients with unauthenticated ones aimed at the fake."""
+    import httplib2
+    from googleapiclient.discovery import build
+
+    def gmail():
+        return build("gmail", "v1", http=httplib2.Http(), static_discovery=True, cache_discovery=False,
+                     client_options={"api_endpoint": f"{url}/"})
+
+    def calendar():
+        # api_endpoint replaces rootUrl + servicePath, so the calendar/v3/ prefix is part of it
+        return build("calendar", "v3", http=httplib2.Http(), static_discovery=True, cache_discovery=False,
+                     client_options={"api_endpoint": f"{url}/calendar/v3/"})
+
+    for module, name, fn in (("auth", "auth_gmail", gmail), ("auth", "auth_calendar", calendar),
+                             ("gmailapi", "auth_gmail", gmail), ("calendarapi", "auth_calendar", calendar)):
+        if module in sys.modules:
+            setattr(sys.modules[module], name, fn)
+
+
+def failed(result) -> bool:
+    """True when a tool call raised or answered with an error payload."""
+    if isinstance(result, tuple):  # (content, structured) from FastMCP.call_tool
+        result = result[0]
+    if getattr(result, "isError", False):
+        return True
+    content = getattr(result, "content", result)
+    text = next((c.text for c in content or () if getattr(c, "type", None) == "text"), "")
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        payload = text
+    if isinstance(payload, str):
+        return payload.startswith(_ERROR_PREFIXES)
+    if isinstance(payload, dict):
+        results = payload.get("results") or []
+        return bool(payload.get("error") or payload.get("errors")
+                    or any(isinstance(r, dict) and r.get("error") for r in results))
+    return False
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return float("nan")
+    # Nearest-rank: the smallest sample with at least q% of the samples at or below it
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def run_round(gateway, scenarios: list, requests: int, concurrency: int, keys: int, rng: random.Random):
+    """Issue `requests` calls (scenarios in turn) from `concurrency` workers; returns (wall seconds, samples)."""
+    plan = []
+    for i in range(requests):
+        name = scenarios[i % len(scenarios)]
+        ns, tool, arguments = SCENARIOS[name]
+        plan.append((name, f"{ns}_{tool}", arguments(rng.randrange(keys), rng, keys)))
+    samples = {name: {"latency": [], "errors": 0} for name in scenarios}
+    position = iter(plan)
+
+    async def worker():
+        for name, tool, arguments in position:
+            start = time.perf_counter()
+            try:
+                bad = failed(await gateway.call(tool, arguments))
+            except Exception:
+                bad = True
+            samples[name]["latency"].append(time.perf_counter() - start)
+            samples[name]["errors"] += bad
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return time.perf_counter() - start, samples
+
+
+def summarize(wall: float, samples: dict, upstreams: dict) -> dict:
+    scenarios = {}
+    for name, s in samples.items():
+        ordered = sorted(s["latency"])
+        scenarios[name] = {
+            "requests": len(ordered), "errors": s["errors"],
+            "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else None,
+        }
+    total = sum(s["requests"] for s in scenarios.values())
+    return {
+        "requests": total,
+        "errors": sum(s["errors"] for s in scenarios.values()),
+        "seconds": round(wall, 3),
+        "throughput_rps": round(total / wall, 1) if wall else None,
+        "scenarios": scenarios,
+        "upstream": {name: u.stats() for name, u in upstreams.items() if u.calls},
+    }
+
+
+def report(index: int, result: dict):
+    print(f"\nround {index}: {result['requests']} requests in {result['seconds']:.2f}s "
+          f"= {result['throughput_rps']} req/s, {result['errors']} errors")
+    print(f"  {'scenario':<20}{'n':>7}{'err':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in result["scenarios"].items():
+        print(f"  {name:<20}{s['requests']:>7}{s['errors']:>6}{s['p50_ms']:>10.1f}{s['p99_ms']:>10.1f}"
+              f"{s['max_ms'] or 0:>10.1f}")
+    print(f"  {'upstream':<34}{'calls':>8}{'per req':>9}")
+    for name, u in result["upstream"].items():
+        extra = ", ".join(f"{k} {u[k]}" for k in ("errors", "rate_limited") if u[k])
+        print(f"  {name:<34}{u['total']:>8}{u['total'] / max(1, result['requests']):>9.2f}"
+              + (f"   ({extra})" if extra else ""))
+        for endpoint, calls in sorted(u["calls"].items()):
+            print(f"    {endpoint:<32}{calls:>8}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the MCP servers against local fake upstreams.")
+    parser.add_argument("--only", help="comma-separated scenarios or namespaces "
+                                       f"(default: all; namespaces: {', '.join(sorted({v[0] for v in SCENARIOS.values()}))})")
+    parser.add_argument("--requests", type=int, default=300, help="tool calls per round (default 300)")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent callers (default 20)")
+    parser.add_argument("--rounds", type=int, default=1, help="rounds over the same servers; later rounds run warm")
+    parser.add_argument("--keys", type=int, default=20,
+                        help="distinct cities/topics/symbols per scenario; fewer keys, more cache hits (default 20)")
+    parser.add_argument("--latency", default="0.05", help="upstream response delay in seconds (default 0.05)")
+    parser.add_argument("--jitter", default="0", help="extra random delay up to this many seconds")
+    parser.add_argument("--error-rate", default="0", help="share of upstream requests answered with a 5xx")
+    parser.add_argument("--rate-limit", default="0", help="upstream requests allowed per minute (0 = unlimited)")
+    parser.add_argument("--fixtures", type=Path, default=fakes.FIXTURES, help="directory of recorded responses")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def selected_scenarios(only: str | None) -> list:
+    if not only:
+        return list(SCENARIOS)
+    names = []
+    for item in filter(None, (p.strip() for p in only.split(","))):
+        matched = [s for s, (ns, _, _) in SCENARIOS.items() if item in (s, ns)]
+        if not matched:
+            raise SystemExit(f"Unknown scenario or namespace '{item}'")
+        names.extend(m for m in matched if m not in names)
+    return names
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    scenarios = selected_scenarios(args.only)
+    latency, jitter = per_upstream(args.latency), per_upstream(args.jitter)
+    error_rate, rate_limit = per_upstream(args.error_rate), per_upstream(args.rate_limit, int)
+    upstreams = {name: fakes.Upstream(name, latency[name], jitter[name], error_rate[name], rate_limit[name],
+                                      seed=args.seed) for name in fakes.UPSTREAMS}
+
+    with tempfile.TemporaryDirectory(prefix="mcp-bench-") as workdir:
+        async with fakes.serve(upstreams, args.fixtures) as urls:
+            configure(Path(workdir), urls)
+            # Imported only now: the gateway and the servers read their settings at import
+            import gateway
+            from mcp_common.http import http_lifespan
+
+            namespaces = list(dict.fromkeys(SCENARIOS[s][0] for s in scenarios))
+            gw = gateway.Gateway(namespaces, manifest_path=Path(os.environ["GATEWAY_MANIFEST"]))
+            await gw.build()
+            mounted = {ns for ns, _ in gw.routes.values()}
+            if "gmail" in mounted:
+                await gw.server("gmail")
+                patch_google(urls["google"])
+            skipped = [s for s in scenarios if SCENARIOS[s][0] not in mounted]
+            if skipped:
+                print(f"skipping (server not importable): {', '.join(skipped)}", file=sys.stderr)
+            scenarios = [s for s in scenarios if s not in skipped]
+            if not scenarios:
+                raise SystemExit("Nothing to run")
+            # Import every server before timing anything
+            for ns in namespaces:
+                if ns in mounted:
+                    await gw.server(ns)
+
+            rng = random.Random(args.seed)
+            results = []
+            async with http_lifespan(None):
+                for index in range(1, args.rounds + 1):
+                    for upstream in upstreams.values():
+                        upstream.calls.clear()
+                        upstream.errors = upstream.limited = 0
+                    wall, samples = await run_round(gw, scenarios, args.requests, args.concurrency, args.keys, rng)
+                    results.append(summarize(wall, samples, upstreams))
+                    report(index, results[-1])
+
+    if args.json:
+        settings = {k: v for k, v in vars(args).items() if k != "json"}
+        args.json.write_text(json.dumps({"settings": {**settings, "fixtures": str(args.fixtures)},
+                                         "rounds": results}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,7 @@ import pathspec
 import fnmatch
 from typing import Annotated
 from mcp.server.fastmcp import FastMCP
+from mcp_common.transport import run
 
 # --- Configuration ---
 
@@ -371,17 +372,11 @@ async def search_files(
 
 # --- Server Entrypoint ---
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python server.py <root_directory>", file=sys.stderr)
-        sys.exit(1)
-
-    # Set the global ROOT_PATH
-    ROOT_PATH = os.path.abspath(sys.argv[1])
 
-    if not os.path.exists(ROOT_PATH) or not os.path.isdir(ROOT_PATH):
-        print(f"Error: Directory does not exist: {ROOT_PATH}", file=sys.stderr)
-        sys.exit(1)
+def configure(root_directory: str) -> int:
+    """Serve `root_directory`: set ROOT_PATH and load its ignore patterns. Returns the pattern count."""
+    global ROOT_PATH, IGNORE_PATTERNS
+    ROOT_PATH = os.path.abspath(root_directory)
 
     # Initialize ignore patterns
     gitignore_path = os.path.join(ROOT_PATH, ".gitignore")
@@ -391,15 +386,30 @@ if __name__ == "__main__":
             patterns = f.readlines()
     else:
         patterns = DEFAULT_IGNORE_PATTERNS
-    
+
     # Set the global IGNORE_PATTERNS
     IGNORE_PATTERNS = pathspec.PathSpec.from_lines("gitwildmatch", patterns)
+    return len(patterns)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python server.py <root_directory>", file=sys.stderr)
+        sys.exit(1)
+
+    root_directory = os.path.abspath(sys.argv[1])
+
+    if not os.path.exists(root_directory) or not os.path.isdir(root_directory):
+        print(f"Error: Directory does not exist: {root_directory}", file=sys.stderr)
+        sys.exit(1)
+
+    pattern_count = configure(root_directory)
 
     print(
         f"Starting MCP filesystem server in: {ROOT_PATH}",
         file=sys.stderr,
     )
-    print(f"Ignoring {len(patterns)} patterns.", file=sys.stderr)
+    print(f"Ignoring {pattern_count} patterns.", file=sys.stderr)
 
-    # Run the server using stdio
-    mcp.run(transport="stdio")
\ No newline at end of file
+    # Run the server using stdio (or streamable HTTP with MCP_TRANSPORT=http)
+    run(mcp, port=8100)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""
+Single-process gateway for all MCP servers in this repository.
+
+Each server's tools are exposed under a namespace prefix (weather_get_current_weather,
+stock_quotes, ...). Tool definitions come from a manifest cached next to this file,
+so at startup no server module is imported; a server (and its dependencies, e.g.
+googleapiclient for Gmail) is imported on the first call to one of its tools.
+The manifest entry of a server is rebuilt whenever one of its .py files changes.
+
+All servers share this process: one environment, one pooled aiohttp session
+(mcp_common.http) and one event loop.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import importlib
+import importlib.util
+from pathlib import Path
+
+import mcp.types as types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+from dotenv import load_dotenv
+from mcp_common.http import http_lifespan
+from mcp_common.transport import TRANSPORT, HTTP_TRANSPORTS, serve_http
+
+ROOT = Path(__file__).resolve().parent
+MANIFEST_PATH = Path(os.getenv("GATEWAY_MANIFEST", ROOT / ".gateway_manifest.json"))
+
+# namespace -> server directory, module holding `mcp`, and data-file settings.
+# Data files default to the server's own directory, as when it runs standalone from there.
+NAMESPACES = {
+    "fs": {"dir": "filesystem-MCP", "module": "main", "env": {}},
+    "gmail": {"dir": "Gmail-MCP", "module": "main", "env": {
+        "GOOGLE_CREDENTIALS": "credentials.json",
+        "GOOGLE_TOKEN": "token.json",
+        "CALENDAR_CACHE": "calendar_cache.json",
+    }},
+    "weather": {"dir": "Weather-Info", "module": "main", "env": {
+        "WEATHER_LOCATION_CACHE": "location_cache.db",
+    }},
+    "news": {"dir": "News-MCP", "module": "news_mcp.main", "env": {
+        "NEWS_CACHE_PATH": "news_cache.db",
+    }},
+    "news_user": {"dir": "News-MCP-User", "module": "news_user.main", "env": {
+        "NEWS_WATCHLIST_PATH": "watchlist.json",
+        "NEWS_WATCHLIST_SEEN_PATH": "watchlist_seen.bin",
+    }},
+    "stock": {"dir": "Stock-MCP", "module": "stockinfo", "env": {
+        "STOCK_STORE_DIR": "series_store",
+    }},
+}
+
+
+def _stamp(namespace: str) -> list:
+    """mtime/size of the server's Python sources; a change invalidates its manifest entry."""
+    base = ROOT / NAMESPACES[namespace]["dir"]
+    files = sorted(p for pattern in ("*.py", "*/*.py") for p in base.glob(pattern)
+                   if not any(part.startswith(".") for part in p.relative_to(base).parts))
+    return [[str(p.relative_to(base)), p.stat().st_mtime_ns, p.stat().st_size] for p in files]
+
+
+def _env_defaults():
+    """
+    Data-file settings of every namespace, not just the one being imported: servers
+    import each other (news pulls in news_user) and read their paths at import.
+    """
+    for spec in NAMESPACES.values():
+        for name, value in spec["env"].items():
+            os.environ.setdefault(name, str(ROOT / spec["dir"] / value))
+
+
+def _import_server(namespace: str, fs_root: str | None = None):
+    """Import a server module the way it runs standalone and return its FastMCP instance."""
+    spec = NAMESPACES[namespace]
+    base = ROOT / spec["dir"]
+    load_dotenv(base / ".env")
+    _env_defaults()
+    if str(base) not in sys.path:
+        sys.path.insert(0, str(base))
+    if "." in spec["module"]:
+        module = importlib.import_module(spec["module"])
+    else:
+        # Several servers call their entry module main.py; load each under its own name
+        name = f"gateway_{namespace}"
+        module = sys.modules.get(name)
+        if module is None:
+            loader = importlib.util.spec_from_file_location(name, base / f"{spec['module']}.py")
+            module = importlib.util.module_from_spec(loader)
+            sys.modules[name] = module
+            try:
+                loader.loader.exec_module(module)
+            except BaseException:
+                del sys.modules[name]
+                raise
+    if namespace == "fs":
+        module.configure(fs_root)
+    return module.mcp
+
+
+async def _list_tools(server) -> list:
+    if hasattr(server, "get_tools"):  # fastmcp 2.x (Stock-MCP)
+        return [tool.to_mcp_tool(name=key) for key, tool in (await server.get_tools()).items()]
+    return await server.list_tools()  # mcp.server.fastmcp
+
+
+async def _call_tool(server, name: str, arguments: dict):
+    if hasattr(server, "get_tool"):
+        tool = await server.get_tool(name)
+        return (await tool.run(arguments)).to_mcp_result()
+    return await server.call_tool(name, arguments)
+
+
+class Gateway:
+    def __init__(self, namespaces: list, fs_root: str | None = None, manifest_path: Path = MANIFEST_PATH):
+        self.namespaces = namespaces
+        self.fs_root = fs_root
+        self.manifest_path = manifest_path
+        self.tools = []
+        self.routes = {}
+        self._servers = {}
+        self._locks = {ns: asyncio.Lock() for ns in namespaces}
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    async def build(self):
+        """Register every namespace's tools, importing only servers whose manifest entry is stale."""
+        manifest = self._read_manifest()
+        changed = False
+        for ns in self.namespaces:
+            stamp = _stamp(ns)
+            entry = manifest.get(ns)
+            if entry is None or entry.get("stamp") != stamp:
+                try:
+                    server = self._servers[ns] = _import_server(ns, self.fs_root)
+                    tools = [t.model_dump(mode="json", exclude_none=True) for t in await _list_tools(server)]
+                except Exception as e:
+                    print(f"gateway: skipping '{ns}': {type(e).__name__}: {e}", file=sys.stderr)
+                    continue
+                entry = manifest[ns] = {"stamp": stamp, "tools": tools}
+                changed = True
+            for tool in entry["tools"]:
+                exposed = f"{ns}_{tool['name']}"
+                self.routes[exposed] = (ns, tool["name"])
+                self.tools.append(types.Tool.model_validate({**tool, "name": exposed}))
+        if changed:
+            tmp = self.manifest_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp, self.manifest_path)
+
+    async def server(self, ns: str):
+        """The namespace's server, imported on first use (off the event loop)."""
+        if ns not in self._servers:
+            async with self._locks[ns]:
+                if ns not in self._servers:
+                    self._servers[ns] = await asyncio.to_thread(_import_server, ns, self.fs_root)
+        return self._servers[ns]
+
+    async def call(self, name: str, arguments: dict):
+        if name not in self.routes:
+            raise ValueError(f"Unknown tool: {name}")
+        ns, tool = self.routes[name]
+        return await _call_tool(await self.server(ns), tool, arguments)
+
+
+def create_server(gateway: Gateway) -> Server:
+    server = Server("MCP-Gateway", lifespan=http_lifespan)
+
+    @server.list_tools()
+    async def list_tools() -> list[types.Tool]:
+        return gateway.tools
+
+    @server.call_tool()
+    async def call_tool(name: str, arguments: dict):
+        return await gateway.call(name, arguments)
+
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve all MCP servers of this repository from one process.")
+    parser.add_argument("--only", default=os.getenv("GATEWAY_NAMESPACES"),
+                        help=f"comma-separated namespaces to mount (default: all of {', '.join(NAMESPACES)})")
+    parser.add_argument("--fs-root", default=os.getenv("GATEWAY_FS_ROOT"),
+                        help="directory served by the 'fs' namespace; without it 'fs' is not mounted")
+    return parser.parse_args(argv)
+
+
+def selected_namespaces(args) -> list:
+    names = [n.strip() for n in args.only.split(",") if n.strip()] if args.only else list(NAMESPACES)
+    unknown = [n for n in names if n not in NAMESPACES]
+    if unknown:
+        raise SystemExit(f"Unknown namespace(s): {', '.join(unknown)}")
+    if "fs" in names and not (args.fs_root and os.path.isdir(args.fs_root)):
+        if args.only:
+            raise SystemExit("The 'fs' namespace needs --fs-root <existing directory>")
+        names.remove("fs")
+    return names
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    gateway = Gateway(selected_namespaces(args), args.fs_root)
+    await gateway.build()
+    print(f"gateway: {len(gateway.tools)} tools from {', '.join(sorted({ns for ns, _ in gateway.routes.values()}))}",
+          file=sys.stderr)
+    server = create_server(gateway)
+    if TRANSPORT in HTTP_TRANSPORTS:
+        await serve_http(server, port=8000)
+        return
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())